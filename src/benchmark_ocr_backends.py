@@ -0,0 +1,88 @@
+# =============================================================================
+# benchmark_ocr_backends.py
+# -----------------------------------------------------------------------------
+# Measures per-image OCR latency of the available OCR backends over a folder
+# of captured detail views.
+#   baseline   : pytesseract with Tesseract defaults (process per image)
+#   pytesseract: pytesseract with the configured language/psm/whitelist
+#   tesserocr  : one persistent engine with the same settings (if installed)
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Usage:
+#   python benchmark_ocr_backends.py [snapshot_dir] [repeats]
+#
+# Notes:
+#   - Snapshots are only on disk when SAVE_SNAPSHOTS_TO_DISK is enabled.
+#   - Every backend gets the same preprocessed images, so the numbers compare
+#     the engines only.
+# =============================================================================
+
+import glob
+import os
+import statistics
+import sys
+import time
+
+from canvas_capture import frame_filename
+from image_preprocessing import load_image_for_ocr
+from ocr_backends import PytesseractBackend, TesserocrBackend
+from schedule_extractor_config import SCREENSHOT_OUTPUT_DIR
+
+
+def time_backend(backend, images, repeats):
+    """Return the per-image latencies (seconds) of backend over images."""
+    latencies = []
+    for _ in range(repeats):
+        for image in images:
+            started = time.perf_counter()
+            backend.image_to_string(image)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    snapshot_dir = sys.argv[1] if len(sys.argv) > 1 else SCREENSHOT_OUTPUT_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    # Frames are saved in the configured CAPTURE_FORMAT (.png, .webp or .jpeg)
+    pattern = frame_filename("detail_view_*")
+    paths = sorted(glob.glob(os.path.join(snapshot_dir, pattern)))
+    if not paths:
+        print(f"No {pattern} files found in {snapshot_dir}")
+        return
+
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(load_image_for_ocr(f.read()))
+    print(f"Benchmarking {len(images)} image(s) x {repeats} repeat(s) from {snapshot_dir}\n")
+
+    candidates = [
+        ("baseline", lambda: PytesseractBackend(psm=3, whitelist="")),
+        ("pytesseract", PytesseractBackend),
+        ("tesserocr", TesserocrBackend),
+    ]
+
+    print(f"{'backend':<12} {'load ms':>8} {'mean ms':>8} {'median ms':>10} {'min ms':>8}")
+    for label, factory in candidates:
+        try:
+            started = time.perf_counter()
+            backend = factory()
+            load_ms = (time.perf_counter() - started) * 1000
+        except ImportError as e:
+            print(f"{label:<12} skipped ({e})")
+            continue
+
+        backend.image_to_string(images[0])  # Warm-up
+        latencies = [t * 1000 for t in time_backend(backend, images, repeats)]
+        backend.close()
+        print(f"{label:<12} {load_ms:>8.1f} {statistics.mean(latencies):>8.1f} "
+              f"{statistics.median(latencies):>10.1f} {min(latencies):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# =============================================================================
+# benchmark_ocr_parser.py
+# -----------------------------------------------------------------------------
+# Measures the throughput (rows per second) of ocr_text_parser.parse_ocr_text
+# against the previous multi-regex parser on a synthetic corpus of detail-view
+# OCR texts, and checks that both produce the same entries.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Usage:
+#   python benchmark_ocr_parser.py [rows] [seed]
+#
+# Notes:
+#   - The corpus mixes clean cards, OCR noise (lower-case am/pm, missing
+#     spaces, stray digits) and unscheduled days.
+#   - The legacy parser below includes the one intended behavior change:
+#     times without a space before AM/PM are parsed instead of rejected.
+# =============================================================================
+
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+from ocr_text_parser import parse_ocr_text, WEEKDAYS, MONTHS
+
+FIRST_NAMES = ["Martin", "Ana", "Luis", "Keisha", "Tom", "Priya", "Wei", "Olga"]
+DEPARTMENTS = ["021 - Lumber", "024 - Building Materials", "028 - Garden Center", "030 - Hardware & Tools", "038 - Front End"]
+
+
+def legacy_parse_ocr_text(png_filename, text):
+    """The parser as it was before ocr_text_parser: one re.search per field and strptime per time."""
+    if "not assigned" in text.lower() or "not scheduled" in text.lower():
+        return None
+
+    match = re.search(r'\b([A-Z][a-zA-Z]*) ([A-Z])\b', text)
+    username = f"{match.group(1)} {match.group(2)}" if match else ''
+    store_number = re.search(r'#\d{4}', text)
+    store_number = store_number.group(0) if store_number else ''
+    weekday = re.search(r'\b(Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b', text)
+    weekday = weekday.group(0) if weekday else ''
+    month = re.search(r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b', text)
+    month = month.group(0) if month else ''
+    date = re.search(r'\b([12][0-9]|3[01]|[1-9])\b', text)
+    date = date.group(0) if date else ''
+
+    times = re.findall(r'\d{1,2}:\d{2}\s*[AP]M', text, re.IGNORECASE)
+    shift_start = times[0] if len(times) > 0 else ''
+    meal_start = times[1] if len(times) > 1 else ''
+    meal_end = ''
+    shift_end = times[-1] if times else ''
+
+    def parse_time(t):
+        # Accepts "11:00am"/"7:00AM" like shift_record.time_to_minutes; the original
+        # required the space and fell back to the third time, dropping the meal end
+        return datetime.strptime(re.sub(r'\s*([AP]M)$', r' \1', t.strip().upper()), "%I:%M %p")
+    if meal_start:
+        try:
+            meal_start_dt = parse_time(meal_start)
+            for t in times[2:]:
+                t_dt = parse_time(t)
+                diff = (t_dt - meal_start_dt).total_seconds() / 60
+                if diff in (30, 60):
+                    meal_end = t
+                    break
+        except Exception:
+            meal_end = times[2] if len(times) > 2 else ''
+
+    dept_match = re.search(r'0\d{2}\s*-\s*[A-Za-z &]+', text)
+    department = dept_match.group(0).strip() if dept_match else ''
+
+    return {
+        'png_filename': png_filename, 'username': username, 'store_number': store_number,
+        'weekday': weekday, 'month': month, 'date': date, 'shift_start': shift_start,
+        'meal_start': meal_start, 'meal_end': meal_end, 'shift_end': shift_end, 'department': department
+    }
+
+
+def format_time(rng, minute_of_day):
+    """Format a minute of day the way the OCR tends to read it, with occasional noise."""
+    hour, minute = divmod(minute_of_day % 1440, 60)
+    meridiem = "AM" if hour < 12 else "PM"
+    text = f"{hour % 12 or 12}:{minute:02d}"
+    roll = rng.random()
+    if roll < 0.05:
+        return text + meridiem.lower()
+    if roll < 0.08:
+        return text + meridiem
+    return f"{text} {meridiem}"
+
+
+def synthetic_text(rng):
+    """One detail-view OCR text in the layout of the schedule app."""
+    if rng.random() < 0.15:
+        return f"{rng.choice(WEEKDAYS)} {rng.choice(MONTHS)} {rng.randint(1, 28)} Not Scheduled"
+    start = rng.randrange(5 * 60, 14 * 60, 15)
+    meal = start + rng.choice([180, 240, 270])
+    end = start + rng.choice([480, 510, 540])
+    parts = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice('ABCDEFGHJKLMNPRSTW')}",
+        f"#{rng.randint(1000, 9999)}",
+        f"{rng.choice(WEEKDAYS)}, {rng.choice(MONTHS)} {rng.randint(1, 31)}",
+        f"Shift {format_time(rng, start)} - {format_time(rng, end)}",
+        f"Meal {format_time(rng, meal)} - {format_time(rng, meal + rng.choice([30, 60]))}",
+        f"{rng.choice(DEPARTMENTS)} {rng.randint(1, 99) if rng.random() < 0.3 else ''}",
+    ]
+    if rng.random() < 0.1:
+        parts.insert(rng.randrange(len(parts)), f"{format_time(rng, rng.randrange(1440))}")
+    return " ".join(parts)
+
+
+def rows_per_second(parser, corpus):
+    started = time.perf_counter()
+    for index, text in enumerate(corpus):
+        parser(f"detail_view_{index}_canvas.png", text)
+    return len(corpus) / (time.perf_counter() - started)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 42
+    rng = random.Random(seed)
+    corpus = [synthetic_text(rng) for _ in range(rows)]
+
+    mismatches = [
+        text for index, text in enumerate(corpus)
+        if parse_ocr_text(str(index), text) != legacy_parse_ocr_text(str(index), text)
+    ]
+    print(f"Corpus: {rows} rows, {len(mismatches)} parse difference(s) between the parsers")
+    for text in mismatches[:5]:
+        print(f"  differs: {text!r}")
+
+    legacy_rate = rows_per_second(legacy_parse_ocr_text, corpus)
+    new_rate = rows_per_second(parse_ocr_text, corpus)
+    print(f"{'legacy':<10} {legacy_rate:>12,.0f} rows/s")
+    print(f"{'tokenizer':<10} {new_rate:>12,.0f} rows/s  ({new_rate / legacy_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
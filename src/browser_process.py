@@ -0,0 +1,111 @@
+# =============================================================================
+# browser_process.py
+# -----------------------------------------------------------------------------
+# Lifecycle of the chromedriver and Chrome processes started for one driver.
+# The PIDs of chromedriver and the Chrome browser are recorded when the driver
+# is launched. Teardown quits the driver, then terminates whatever is left of
+# that process tree (renderer, GPU and utility processes included), waits a
+# bounded time and kills the processes that are still running.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Only the recorded tree is touched; other Chrome windows and concurrent
+#     runs on the same host are left alone, and the process table is never scanned.
+#   - psutil.Process remembers each process's creation time, so a PID reused
+#     by an unrelated process after ours exited is never signalled.
+# =============================================================================
+
+import psutil
+
+from schedule_extractor_config import BROWSER_TERMINATE_TIMEOUT
+
+
+def driver_root_pids(driver):
+    """PIDs of the chromedriver service and (for undetected_chromedriver) the browser it started."""
+    pids = []
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    if process is not None:
+        pids.append(process.pid)
+    browser_pid = getattr(driver, 'browser_pid', None)
+    if browser_pid:
+        pids.append(browser_pid)
+    return pids
+
+
+class BrowserProcessTree:
+    """The chromedriver and Chrome processes belonging to one driver."""
+
+    def __init__(self, pids):
+        self.roots = []
+        for pid in pids:
+            try:
+                self.roots.append(psutil.Process(pid))
+            except psutil.Error:
+                continue
+
+    @classmethod
+    def from_driver(cls, driver):
+        return cls(driver_root_pids(driver))
+
+    def processes(self):
+        """The roots that are still running and all their descendants."""
+        found = {}
+        for root in self.roots:
+            try:
+                if not root.is_running():
+                    continue
+                found[root.pid] = root
+                for child in root.children(recursive=True):
+                    found[child.pid] = child
+            except psutil.Error:
+                continue
+        return list(found.values())
+
+    def terminate(self, processes=None, timeout=BROWSER_TERMINATE_TIMEOUT):
+        """
+        Terminate processes (default: the current tree), wait up to timeout seconds,
+        then kill the survivors. Returns the number of processes that had to be stopped.
+        """
+        processes = [p for p in (self.processes() if processes is None else processes) if p.is_running()]
+        if not processes:
+            return 0
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.Error:
+                continue
+        _, alive = psutil.wait_procs(processes, timeout=timeout)
+        for process in alive:
+            try:
+                print(f"Killing browser process {process.pid} that did not exit within {timeout}s")
+                process.kill()
+            except psutil.Error:
+                continue
+        if alive:
+            psutil.wait_procs(alive, timeout=timeout)
+        return len(processes)
+
+
+def quit_browser(driver, tree=None, timeout=BROWSER_TERMINATE_TIMEOUT):
+    """
+    Quit the driver and make sure every process it started has exited.
+    tree defaults to the one recorded by launch_browser.
+    """
+    tree = tree or getattr(driver, 'process_tree', None) or BrowserProcessTree.from_driver(driver)
+    # Snapshot the descendants first: once chromedriver exits its children are re-parented
+    processes = tree.processes()
+    canvas_input = getattr(driver, 'canvas_input', None)
+    if canvas_input is not None:
+        canvas_input.close()  # DevTools input connection (canvas_input.py)
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"WARNING: driver.quit() failed: {e}")
+    stopped = tree.terminate(processes, timeout=timeout)
+    if stopped:
+        print(f"Stopped {stopped} leftover browser process(es)")
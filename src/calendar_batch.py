@@ -0,0 +1,159 @@
+# =============================================================================
+# calendar_batch.py
+# -----------------------------------------------------------------------------
+# Batched Google Calendar API requests.
+# Groups many events() calls into batch HTTP requests (one round trip per
+# BATCH_SIZE calls), reports the outcome of every sub-request and retries only
+# the sub-requests that failed with a retryable error.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Requests are passed as (request_id, factory) pairs. The factory builds a
+#     fresh HttpRequest, so a failed sub-request can be re-added to a new batch.
+#   - With max_concurrency > 1 the batches of a round run on a thread pool.
+#     httplib2 is not thread-safe, so every worker thread sends its batches
+#     over its own transport built by http_factory.
+#   - Used by calendar_builder.py, calendar_writer.py and delete_calendar_events.py.
+# =============================================================================
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
+
+BATCH_SIZE = 50        # Maximum calls the Calendar API accepts in one batch request
+MAX_RETRIES = 4        # Retry rounds for sub-requests that failed with a retryable error
+RETRY_BASE_DELAY = 1.0 # Seconds; doubled on every retry round
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+_local = threading.local()
+
+
+def error_reason(error):
+    """Return the first 'reason' of an HttpError, e.g. 'rateLimitExceeded', or ''."""
+    try:
+        details = error.error_details
+        if isinstance(details, list) and details:
+            return details[0].get("reason", "")
+    except Exception:
+        pass
+    return ""
+
+
+def is_retryable(error):
+    """True for errors worth retrying: 429, 5xx, and 403 rate-limit responses."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    return status == 403 and error_reason(error) in RATE_LIMIT_REASONS
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def make_http_factory(creds):
+    """Build a factory for per-thread authorized transports (httplib2 is not thread-safe)."""
+    def factory():
+        return AuthorizedHttp(creds, http=httplib2.Http())
+    return factory
+
+
+def thread_http(http_factory):
+    """Return this thread's transport from http_factory (None: the service's own)."""
+    if http_factory is None:
+        return None
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = http_factory()
+    return http
+
+
+def _execute_chunk(service, chunk, factories, callback, http_factory, rate_limiter, stats):
+    """Send one batch; if the whole batch fails (network error, 5xx), report it for every sub-request."""
+    if rate_limiter is not None:
+        rate_limiter.acquire(len(chunk))  # Every sub-request counts against the quota
+    batch = service.new_batch_http_request(callback=callback)
+    for request_id in chunk:
+        batch.add(factories[request_id](), request_id=request_id)
+    started = time.perf_counter()
+    try:
+        batch.execute(http=thread_http(http_factory))
+    except Exception as e:
+        for request_id in chunk:
+            callback(request_id, None, e)
+    finally:
+        if stats is not None:
+            latency = time.perf_counter() - started
+            for _ in chunk:
+                stats.record_latency(latency)
+
+
+def execute_batched(service, requests, batch_size=BATCH_SIZE, max_retries=MAX_RETRIES,
+                    max_concurrency=1, http_factory=None, rate_limiter=None, stats=None):
+    """
+    Execute requests in batches and return {request_id: (response, error)}.
+
+    requests: list of (request_id, factory) pairs; request_id must be a unique string.
+    Sub-requests failing with a retryable error are retried (only those) with
+    exponential backoff; any other error is recorded and not retried.
+    max_concurrency batches are in flight at once; http_factory builds the
+    per-thread transport (e.g. an AuthorizedHttp) needed when it is above 1.
+    rate_limiter (a calendar_writer.TokenBucket) paces the sub-requests;
+    stats (a calendar_writer.WriteStats) records their latency and retries.
+    """
+    factories = dict(requests)
+    results = {}
+    retries = {}  # {request_id: retry round of its last attempt}
+    pending = [request_id for request_id, _ in requests]
+    round_trips = 0
+
+    for attempt in range(max_retries + 1):
+        retry = []
+
+        def callback(request_id, response, exception):
+            # Non-HTTP errors only come from a failed batch round trip (connection reset, timeout)
+            transient = is_retryable(exception) or (exception is not None and not isinstance(exception, HttpError))
+            if transient and attempt < max_retries:
+                retry.append(request_id)
+            results[request_id] = (response, exception)
+            retries[request_id] = attempt
+
+        chunks = list(_chunks(pending, batch_size))
+        if max_concurrency > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks))) as pool:
+                for future in [pool.submit(_execute_chunk, service, chunk, factories, callback, http_factory, rate_limiter, stats)
+                               for chunk in chunks]:
+                    future.result()
+        else:
+            for chunk in chunks:
+                _execute_chunk(service, chunk, factories, callback, http_factory, rate_limiter, stats)
+        round_trips += len(chunks)
+
+        if not retry:
+            break
+        delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+        print(f"Retrying {len(retry)} failed request(s) in {delay:.1f}s...")
+        time.sleep(delay)
+        pending = retry
+
+    failed = sum(1 for _, error in results.values() if error is not None)
+    print(f"Batch complete: {len(results) - failed} succeeded, {failed} failed, {round_trips} round trip(s)")
+    if stats is not None:
+        for attempt in retries.values():
+            stats.record_retries(attempt)
+        stats.print_stats()
+    return results
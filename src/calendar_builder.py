@@ -10,7 +10,7 @@ import hashlib
 import uuid
 
 # Assuming schedule_extractor_config.py is accessible and defines OCR_FILEPATH
-from schedule_extractor_config import OCR_FILEPATH
+from schedule_extractor_config import OCR_FILEPATH, OCR_OUTPUT_FILENAME
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -18,10 +18,25 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from calendar_batch import execute_batched, make_http_factory
+from calendar_state_cache import CalendarStateCache, CALENDAR_STATE_FILE, event_date, events_between
+from calendar_writer import CalendarWriter, TokenBucket, WriteStats
+from shift_record import ShiftRecord, format_minutes, scan_window, scan_years
+
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 TOKEN_FILE = "token.json"
 CREDENTIALS_FILE = "credentials.json"
 
+# Private extended property stamped on every event this script creates. Only events carrying
+# this tag are ever deleted by the sync, so manually added events are never touched.
+EVENT_SOURCE_TAG = {'source': 'schedule_extractor'}
+
+SYNC_CONCURRENCY = 4  # Write batches in flight at once (each thread needs its own transport)
+
+# Calendar the shifts are synced to, created on first use
+CALENDAR_NAME = 'work-schedule-cloud'
+CALENDAR_TIMEZONE = 'America/Los_Angeles'
+
 def get_calendar_id_gui():
     """Prompts the user for the Google Calendar ID using a simple GUI dialog."""
     try:
@@ -34,25 +49,24 @@ def get_calendar_id_gui():
         print(f"ERROR: Exception in get_calendar_id_gui: {e}")
         return None
 
-def create_event(service, calendar_id, event_body):
+def make_ical_uid(event_title, start_time_str, end_time_str, calendar_id):
     """
-    Creates or updates a new event in the calendar using iCalUID for idempotency.
+    Build a consistent, reproducible iCalUID from the event's title, times and calendar.
     """
-    try:
-        event = service.events().insert(
-            calendarId=calendar_id,
-            body=event_body,
-            sendUpdates="all"
-        ).execute()
-        print(f"Event created/updated: {event.get('htmlLink')}")
-        return event
-    except HttpError as error:
-        print(f"Error creating/updating event: {error}")
-        return None
+    # Use hashlib to create a consistent, reproducible UID.
+    unique_id_string = f"{str(event_title).strip()}-{str(start_time_str).strip()}-{str(end_time_str).strip()}-{str(calendar_id).strip()}"
+
+    # Create a SHA-1 hash of the unique string.
+    hash_object = hashlib.sha1(unique_id_string.encode('utf-8'))
+    hex_digest = hash_object.hexdigest()
+
+    # Format the hash into a UUID string.
+    return f"{hex_digest[:8]}-{hex_digest[8:12]}-{hex_digest[12:16]}-{hex_digest[16:20]}-{hex_digest[20:32]}"
 
-def upsert_event_icaluid(service, calendar_id, event_data, calendar_timezone):
+def prepare_event_icaluid(calendar_id, event_data, calendar_timezone):
     """
-    Upserts an event using the iCalUID approach for idempotency.
+    Stamps event_data with its deterministic iCalUID and time zone.
+    Returns the event body, or None if essential fields are missing.
     """
     event_title = event_data.get('summary')
     start_time_str = event_data['start'].get('dateTime', event_data['start'].get('date'))
@@ -60,163 +74,415 @@ def upsert_event_icaluid(service, calendar_id, event_data, calendar_timezone):
 
     if not event_title or not start_time_str or not end_time_str:
         print("Error: Event data is missing essential fields. Skipping event.")
-        return
+        return None
 
     try:
-        # Use hashlib to create a consistent, reproducible UID.
-        unique_id_string = f"{str(event_title).strip()}-{str(start_time_str).strip()}-{str(end_time_str).strip()}-{str(calendar_id).strip()}"
-        
-        # Create a SHA-1 hash of the unique string.
-        hash_object = hashlib.sha1(unique_id_string.encode('utf-8'))
-        hex_digest = hash_object.hexdigest()
-
-        # Format the hash into a UUID string.
-        ical_uid = f"{hex_digest[:8]}-{hex_digest[8:12]}-{hex_digest[12:16]}-{hex_digest[16:20]}-{hex_digest[20:32]}"
-
+        ical_uid = make_ical_uid(event_title, start_time_str, end_time_str, calendar_id)
     except Exception as e:
         print(f"Error generating iCalUID for event '{event_title}': {e}")
-        return
-    
+        return None
+
     event_data['iCalUID'] = ical_uid
     event_data['timeZone'] = calendar_timezone
+    return event_data
+
+def list_events_in_window(service, calendar_id, time_min, time_max):
+    """
+    Lists every event between time_min and time_max (RFC3339), following nextPageToken.
+    Deleted events are included so previously removed shifts can be restored instead of re-inserted.
+    """
+    events = []
+    page_token = None
+    while True:
+        response = service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            showDeleted=True,
+            maxResults=2500,
+            pageToken=page_token
+        ).execute()
+        events.extend(response.get('items', []))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return events
 
-    create_event(service, calendar_id, event_data)
+def index_events_by_ical_uid(events):
+    """Returns {iCalUID: event} for the given calendar events."""
+    return {event['iCalUID']: event for event in events if event.get('iCalUID')}
 
-def main(calendar_id=None):
+def is_our_event(event):
+    """True for events created by this script (tagged with EVENT_SOURCE_TAG)."""
+    private = event.get('extendedProperties', {}).get('private', {})
+    return all(private.get(key) == value for key, value in EVENT_SOURCE_TAG.items())
+
+def event_changes(existing, desired):
+    """
+    Returns the patch body needed to turn existing into desired, or {} if nothing changed.
+    Summary and times are part of the iCalUID, so only the description and source tag can drift.
+    """
+    changes = {}
+    if (existing.get('description') or '') != (desired.get('description') or ''):
+        changes['description'] = desired.get('description') or ''
+    if not is_our_event(existing):
+        changes['extendedProperties'] = {'private': dict(EVENT_SOURCE_TAG)}
+    return changes
+
+def plan_event_write(existing_by_uid, desired):
+    """
+    The write one desired event needs: ('insert', event_body), ('patch', (event, patch_body)) or None.
     """
-    Reads a CSV file, validates the data, and creates events in a Google Calendar with user confirmation.
+    existing = existing_by_uid.get(desired['iCalUID'])
+    if existing is None:
+        return 'insert', desired
+    if existing.get('status') == 'cancelled':
+        # A deleted event keeps its iCalUID, so inserting it again would fail; restore it instead
+        restore = {key: desired[key] for key in ('summary', 'start', 'end', 'description', 'extendedProperties')}
+        restore['status'] = 'confirmed'
+        return 'patch', (existing, restore)
+    changes = event_changes(existing, desired)
+    if changes:
+        return 'patch', (existing, changes)
+    return None
+
+def stale_events(existing_by_uid, desired_uids, first_date, last_date):
+    """Our live events between first_date and last_date (YYYY-MM-DD) whose iCalUID is no longer desired."""
+    return [
+        existing for ical_uid, existing in existing_by_uid.items()
+        if ical_uid not in desired_uids
+        and existing.get('status') != 'cancelled'
+        and is_our_event(existing)
+        and first_date <= event_date(existing) <= last_date
+    ]
+
+def plan_calendar_sync(existing_by_uid, desired_by_uid, window=None):
+    """
+    Compares the events already in the calendar with the freshly parsed shifts.
+    Returns a plan dict with the minimal 'insert', 'patch' and 'delete' operations:
+      insert: [event_body]           shifts not in the calendar yet
+      patch:  [(event, patch_body)]  shifts whose details changed, or deleted shifts to restore
+      delete: [event]                our shifts inside the scanned days that are no longer scheduled
+    window is the (first_date, last_date) the scan covered (shift_record.scan_window);
+    delete stays empty without one.
+    """
+    plan = {'insert': [], 'patch': [], 'delete': []}
+
+    for desired in desired_by_uid.values():
+        write = plan_event_write(existing_by_uid, desired)
+        if write is not None:
+            operation, item = write
+            plan[operation].append(item)
+
+    if window is not None:
+        plan['delete'] = stale_events(existing_by_uid, desired_by_uid, *window)
+
+    return plan
+
+def print_sync_plan(plan):
+    """Prints the proposed inserts, patches and deletes."""
+    for label, events in (('Add', plan['insert']),
+                          ('Update', [{**event, **patch_body} for event, patch_body in plan['patch']]),
+                          ('Remove', plan['delete'])):
+        for event in events:
+            start = event['start'].get('dateTime', event['start'].get('date'))
+            end = event['end'].get('dateTime', event['end'].get('date'))
+            print(f"{label}: {event.get('summary')} from {start} to {end}")
+            if event.get('description'):
+                print(f"  - Description: {event['description']}")
+
+def write_request(service, calendar_id, operation, item):
+    """(request_id, factory) for one plan operation, in the form execute_batched and CalendarWriter take."""
+    if operation == 'insert':
+        return f"insert-{item['iCalUID']}", lambda: service.events().insert(
+            calendarId=calendar_id, body=item, sendUpdates="all")
+    if operation == 'patch':
+        event, patch_body = item
+        return f"patch-{event['id']}", lambda: service.events().patch(
+            calendarId=calendar_id, eventId=event['id'], body=patch_body, sendUpdates="all")
+    return f"delete-{item['id']}", lambda: service.events().delete(
+        calendarId=calendar_id, eventId=item['id'], sendUpdates="all")
+
+def apply_calendar_sync(service, calendar_id, plan, http_factory=None, rate_limiter=None, max_concurrency=1):
+    """
+    Executes a sync plan as batch requests. Returns {request_id: (response, error)}.
+    rate_limiter (a TokenBucket) paces the sub-requests; max_concurrency batches are
+    sent at once over per-thread transports from http_factory. Latency and retry
+    stats are printed when the batches are done.
+    """
+    requests = [
+        write_request(service, calendar_id, operation, item)
+        for operation in ('insert', 'patch', 'delete')
+        for item in plan[operation]
+    ]
+
+    if not requests:
+        return {}
+    results = execute_batched(service, requests, max_concurrency=max_concurrency if http_factory else 1,
+                              http_factory=http_factory, rate_limiter=rate_limiter, stats=WriteStats())
+    for request_id, (_, error) in results.items():
+        if error is not None:
+            print(f"Error applying {request_id}: {error}")
+    return results
+
+def sync_events(service, calendar_id, event_bodies, calendar_timezone, confirm=True, state_cache=None,
+                http_factory=None, rate_limiter=None, window=None):
     """
+    Diff-based sync: lists the scanned window once, then issues only the inserts,
+    patches and deletes needed to make the calendar match event_bodies.
+    Stale shifts are only deleted inside window, the (first_date, last_date) the scan covered.
+    Nothing is written when the calendar is already up to date.
+    With a CalendarStateCache only the changes since the last run are fetched;
+    http_factory and rate_limiter are passed on to apply_calendar_sync.
+    """
+    desired_by_uid = {}
+    for event_data in event_bodies:
+        event_body = prepare_event_icaluid(calendar_id, event_data, calendar_timezone)
+        if event_body is None:
+            continue
+        if event_body['iCalUID'] in desired_by_uid:
+            print(f"Skipping duplicate event {event_body['summary']} at {event_body['start']['dateTime']}")
+            continue
+        event_body['extendedProperties'] = {'private': dict(EVENT_SOURCE_TAG)}
+        desired_by_uid[event_body['iCalUID']] = event_body
+
+    if not desired_by_uid and window is None:
+        print("No valid events to sync.")
+        return None
+
+    # List one day either side of the scanned dates so time zone offsets can't hide an event
+    dates = sorted(datetime.date.fromisoformat(date) for date in
+                   [event_date(event) for event in desired_by_uid.values()] + list(window or ()))
+    first_date, last_date = dates[0] - datetime.timedelta(days=1), dates[-1] + datetime.timedelta(days=1)
+    if state_cache is not None:
+        existing = events_between(state_cache.sync(service, calendar_id),
+                                  first_date.isoformat(), last_date.isoformat(), include_cancelled=True)
+    else:
+        time_min = f"{first_date.isoformat()}T00:00:00Z"
+        time_max = f"{(last_date + datetime.timedelta(days=1)).isoformat()}T00:00:00Z"
+        existing = list_events_in_window(service, calendar_id, time_min, time_max)
+    existing_by_uid = index_events_by_ical_uid(existing)
+
+    plan = plan_calendar_sync(existing_by_uid, desired_by_uid, window)
+    print("\n--- Proposed Calendar Changes ---")
+    print(f"{len(plan['insert'])} to add, {len(plan['patch'])} to update, {len(plan['delete'])} to remove")
+    if not any(plan.values()):
+        print("Calendar is already up to date. No changes needed.")
+        return plan
+    print_sync_plan(plan)
+
+    if confirm:
+        answer = input("\nDo you want to apply these changes to your calendar? (Y/n): ")
+        if not (answer.lower() == 'y' or answer == ''):
+            print("\nOperation cancelled by user. No changes were made.")
+            return plan
+
+    print("\nUpdating calendar...")
+    apply_calendar_sync(service, calendar_id, plan, http_factory, rate_limiter, SYNC_CONCURRENCY)
+    print("\nCalendar update complete.")
+    return plan
+
+def stream_sync_events(service, calendar_id, event_bodies, calendar_timezone, state_cache=None, writer=None, confirm=True,
+                       scanned_days=None, skipped_frames=None):
+    """
+    Streaming variant of sync_events for an event body generator.
+    Each event is diffed against the cached calendar as soon as it arrives. With confirm
+    the inserts and patches are held and shown together with the deletes once the stream
+    ends, and nothing is written until the user accepts. Without it each insert/patch is
+    handed to the writer immediately, so the first write happens while later shifts are
+    still being captured (an OCR misparse is written too), and deletes follow unprompted.
+    Deletes of shifts that disappeared need the whole scan: they are only planned when the
+    stream ended without an error, and only inside the days it covered. scanned_days and
+    skipped_frames are filled while the stream runs (parse_stage, dedup_frames, ocr_stage)
+    and checked by shift_record.scan_window.
+    """
+    state_cache = state_cache or CalendarStateCache(CALENDAR_STATE_FILE)
+    writer = writer or CalendarWriter()
+    existing_by_uid = index_events_by_ical_uid(state_cache.sync(service, calendar_id))
+
+    desired_uids = set()
+    plan = {'insert': [], 'patch': [], 'delete': []}
+    futures = {}
+
+    def submit(operation, item):
+        request_id, factory = write_request(service, calendar_id, operation, item)
+        futures[request_id] = writer.submit(factory)
+
+    results = {}
+    try:
+        for event_data in event_bodies:
+            event_body = prepare_event_icaluid(calendar_id, event_data, calendar_timezone)
+            if event_body is None:
+                continue
+            if event_body['iCalUID'] in desired_uids:
+                print(f"Skipping duplicate event {event_body['summary']} at {event_body['start']['dateTime']}")
+                continue
+            event_body['extendedProperties'] = {'private': dict(EVENT_SOURCE_TAG)}
+            desired_uids.add(event_body['iCalUID'])
+
+            write = plan_event_write(existing_by_uid, event_body)
+            if write is None:
+                continue
+            if confirm:
+                plan[write[0]].append(write[1])
+            else:
+                print(f"Streaming {write[0]} for shift at {event_body['start']['dateTime']}")
+                submit(*write)
+
+        # Only reached when the whole stream was consumed; an error above leaves plan['delete'] empty
+        window = scan_window(scanned_days, skipped_frames) if scanned_days is not None else None
+        if window is not None:
+            plan['delete'] = stale_events(existing_by_uid, desired_uids, *window)
+        elif not desired_uids:
+            print("No valid events to sync.")
+
+        if any(plan.values()):
+            print("\n--- Proposed Calendar Changes ---")
+            print(f"{len(plan['insert'])} to add, {len(plan['patch'])} to update, {len(plan['delete'])} to remove")
+            print_sync_plan(plan)
+            answer = input("\nDo you want to apply these changes to your calendar? (Y/n): ") if confirm else ''
+            if answer.lower() == 'y' or answer == '':
+                for operation in ('insert', 'patch', 'delete'):
+                    for item in plan[operation]:
+                        submit(operation, item)
+            else:
+                print("\nOperation cancelled by user. No changes were made.")
+    finally:
+        # Writes already handed to the writer finish even when the stream failed
+        for request_id, future in futures.items():
+            try:
+                results[request_id] = (future.result(), None)
+            except Exception as error:
+                print(f"Error applying {request_id}: {error}")
+                results[request_id] = (None, error)
+        writer.shutdown()
+        writer.print_stats()
+    print(f"\nCalendar update complete: {len(futures)} change(s) written.")
+    return results
+
+def read_structured_csv(csv_path, year=None):
+    """
+    Yields the rows of a structured shift CSV (as written by schedule_extractor) as ShiftRecords.
+    The rows are in capture order, so the year rolls forward where the month decreases.
+    """
+    with open(csv_path, mode='r', encoding='utf-8', newline='') as file:
+        yield from scan_years((ShiftRecord.from_row(row) for row in csv.DictReader(file, skipinitialspace=True)), year)
+
+def valid_shifts(records):
+    """
+    Yields the ShiftRecords that can become calendar events.
+    Records with a missing or unreadable date or shift time are reported and skipped.
+    """
+    for record in records:
+        if record.is_complete():
+            yield record
+        else:
+            print(f"Skipping row due to missing or invalid shift data: {record}")
+
+def shift_event_bodies(records, calendar_timezone):
+    """Yields a calendar event body for every ShiftRecord."""
+    for record in records:
+        description = ""
+        if record.meal_start is not None and record.meal_end is not None:
+            description = f"Meal: {format_minutes(record.meal_start)} - {format_minutes(record.meal_end)}"
+        elif record.meal_start is not None:
+            print(f"Skipping meal info for row with filename {record.png_filename} due to missing end time.")
+        elif record.meal_end is not None:
+            print(f"Skipping meal info for row with filename {record.png_filename} due to missing start time.")
+
+        yield {
+            'summary': 'THD',
+            'start': {
+                'dateTime': record.start_datetime().isoformat(),
+                'timeZone': calendar_timezone,
+            },
+            'end': {
+                'dateTime': record.end_datetime().isoformat(),
+                'timeZone': calendar_timezone,
+            },
+            'description': description
+        }
+
+def get_credentials(token_file=None):
+    """
+    Loads the saved OAuth token (token_file, default TOKEN_FILE), refreshing it or running
+    the browser consent flow when needed.
+    """
+    token_file = token_file or TOKEN_FILE
     creds = None
-    if os.path.exists(TOKEN_FILE):
-        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+    if os.path.exists(token_file):
+        creds = Credentials.from_authorized_user_file(token_file, SCOPES)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
         else:
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=0)
-        with open(TOKEN_FILE, 'w') as token:
+        # Written atomically: concurrent runs share the token and may refresh it at the same time
+        tmp_path = f"{token_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as token:
             token.write(creds.to_json())
+        os.replace(tmp_path, token_file)
+    return creds
+
+def get_or_create_calendar(service, calendar_name=CALENDAR_NAME):
+    """Returns the ID of the calendar named calendar_name, creating it if it doesn't exist."""
+    # Check if the calendar exists
+    calendar_list = service.calendarList().list().execute()
+    existing_calendar = None
+    for calendar_entry in calendar_list.get('items', []):
+        if calendar_entry.get('summary') == calendar_name:
+            existing_calendar = calendar_entry
+            break
 
-    # Set a default calendar name for the script to use
-    calendar_name = 'work-schedule-cloud'
+    if existing_calendar:
+        # If the calendar exists, use its ID
+        calendar_id = existing_calendar['id']
+        print(f"The script will update the calendar: '{calendar_name}' with ID '{calendar_id}'")
+    else:
+        # If the calendar doesn't exist, create it
+        print(f"Calendar '{calendar_name}' not found. Creating a new one...")
+        new_calendar_body = {
+            'summary': calendar_name,
+            'timeZone': CALENDAR_TIMEZONE
+        }
+        new_calendar = service.calendars().insert(body=new_calendar_body).execute()
+        calendar_id = new_calendar['id']
+        print(f"Successfully created new calendar: '{calendar_name}' with ID '{calendar_id}'")
+        print(f"Using calendar time zone: {CALENDAR_TIMEZONE}")
+    return calendar_id
+
+def main(calendar_id=None, context=None):
+    """
+    Reads a CSV file, validates the data, and syncs the shifts to a Google Calendar with user confirmation.
+    With a RunContext the structured CSV of that run's workspace is used, otherwise the published OCR_FILEPATH.
+    """
+    creds = get_credentials(context.token_file if context else None)
+    ocr_csv_filepath = context.path(OCR_OUTPUT_FILENAME) if context else OCR_FILEPATH
 
     try:
         service = build('calendar', 'v3', credentials=creds)
+        calendar_id = get_or_create_calendar(service)
+        calendar_timezone = CALENDAR_TIMEZONE
 
-        # Check if the calendar exists
-        calendar_list = service.calendarList().list().execute()
-        existing_calendar = None
-        for calendar_entry in calendar_list.get('items', []):
-            if calendar_entry.get('summary') == calendar_name:
-                existing_calendar = calendar_entry
-                break
-
-        if existing_calendar:
-            # If the calendar exists, use its ID
-            calendar_id = existing_calendar['id']
-            print(f"The script will update the calendar: '{calendar_name}' with ID '{calendar_id}'")
-        else:
-            # If the calendar doesn't exist, create it
-            print(f"Calendar '{calendar_name}' not found. Creating a new one...")
-            new_calendar_body = {
-                'summary': calendar_name,
-                'timeZone': 'America/Los_Angeles' 
-            }
-            new_calendar = service.calendars().insert(body=new_calendar_body).execute()
-            calendar_id = new_calendar['id']
-            print(f"Successfully created new calendar: '{calendar_name}' with ID '{calendar_id}'")
-            print(f"Using calendar time zone: America/Los_Angeles")
-        
-        calendar_timezone = 'America/Los_Angeles'
-
-        ocr_csv_filepath = OCR_FILEPATH
         if not os.path.exists(ocr_csv_filepath):
             print(f"Error: CSV file not found at '{ocr_csv_filepath}'. Exiting.")
             return
 
         print(f"Attempting to read CSV from: {ocr_csv_filepath}")
-
-        events_to_create = []
-        fieldnames = ['png_filename', 'username', 'store_number', 'weekday', 'month', 'date', 'shift_start', 'meal_start', 'meal_end', 'shift_end', 'department']
-
-        with open(ocr_csv_filepath, mode='r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, fieldnames=fieldnames, skipinitialspace=True)
-            next(reader)  # Skip the header row
-
-            for row in reader:
-                # Robust data validation
-                if not all(row.get(key) and row.get(key).strip() for key in ['month', 'date', 'shift_start', 'shift_end']):
-                    print(f"Skipping row due to missing essential shift data: {row}")
-                    continue
-
-                year = datetime.datetime.now().year
-                month_str = row['month']
-                try:
-                    day = int(row['date'])
-                except (ValueError, KeyError) as e:
-                    print(f"Skipping row due to invalid 'date' value: {row}. Error: {e}")
-                    continue
-
-                try:
-                    month = datetime.datetime.strptime(month_str, "%b").month
-                except ValueError:
-                    try:
-                        month = datetime.datetime.strptime(month_str, "%B").month
-                    except ValueError:
-                        print(f"Skipping row due to invalid month: {row}")
-                        continue
-
-                try:
-                    start_time_str = f"{year}-{month:02d}-{day:02d} {row['shift_start']}"
-                    end_time_str = f"{year}-{month:02d}-{day:02d} {row['shift_end']}"
-                    start_dt = datetime.datetime.strptime(start_time_str, "%Y-%m-%d %I:%M %p")
-                    end_dt = datetime.datetime.strptime(end_time_str, "%Y-%m-%d %I:%M %p")
-                except Exception as e:
-                    print(f"Skipping row due to invalid time format: {row}. Error: {e}")
-                    continue
-
-                # Validate meal data to prevent errors.
-                meal_start = row.get('meal_start', '').strip()
-                meal_end = row.get('meal_end', '').strip()
-                description = ""
-                if meal_start and meal_end:
-                    description = f"Meal: {meal_start} - {meal_end}"
-                elif meal_start and not meal_end:
-                    print(f"Skipping meal info for row with filename {row.get('png_filename')} due to missing end time.")
-                elif meal_end and not meal_start:
-                    print(f"Skipping meal info for row with filename {row.get('png_filename')} due to missing start time.")
-
-                event_body = {
-                    'summary': 'THD',
-                    'start': {
-                        'dateTime': start_dt.isoformat(),
-                        'timeZone': calendar_timezone,
-                    },
-                    'end': {
-                        'dateTime': end_dt.isoformat(),
-                        'timeZone': calendar_timezone,
-                    },
-                    'description': description
-                }
-                events_to_create.append(event_body)
-        
-        print("\n--- Proposed Calendar Changes ---")
-        for event in events_to_create:
-            start_dt_obj = datetime.datetime.fromisoformat(event['start']['dateTime'])
-            end_dt_obj = datetime.datetime.fromisoformat(event['end']['dateTime'])
-            print(f"Event: {event['summary']} from {start_dt_obj.strftime('%b %d, %Y at %I:%M %p')} to {end_dt_obj.strftime('%I:%M %p')}")
-            if event.get('description'):
-                print(f"  - Description: {event['description']}")
-
-        confirm = input("\nDo you want to add these events to your calendar? (Y/n): ")
-        if confirm.lower() == 'y' or confirm == '':
-            print("\nUpdating calendar...")
-            for event_body in events_to_create:
-                upsert_event_icaluid(service, calendar_id, event_body, calendar_timezone)
-            print("\nCalendar update complete.")
+        events_to_create = list(shift_event_bodies(valid_shifts(read_structured_csv(ocr_csv_filepath)), calendar_timezone))
+        # Stale shifts are only removed inside the days this run scanned; a bare CSV doesn't say which those were
+        if context is not None:
+            window = scan_window(context.scanned_days, context.skipped_frames)
         else:
-            print("\nOperation cancelled by user. No changes were made.")
+            window = None
+            print("No scan information for this CSV; shifts missing from it are kept in the calendar.")
+
+        sync_events(service, calendar_id, events_to_create, calendar_timezone,
+                    state_cache=CalendarStateCache(context.state_file if context and context.state_file
+                                                   else CALENDAR_STATE_FILE),
+                    http_factory=make_http_factory(creds), rate_limiter=TokenBucket(),
+                    window=window)
 
     except HttpError as error:
         print(f'An HTTP error occurred: {error}')
@@ -225,7 +491,7 @@ def main(calendar_id=None):
         elif error.resp.status == 403:
             print("Permission denied. Ensure the authenticated user has write access to the calendar.")
         elif error.resp.status == 400:
-            print(f"Bad request. Check event data format or API limits.")
+            print("Bad request. Check event data format or API limits.")
     except FileNotFoundError:
         print(f"The CSV file '{ocr_csv_filepath}' was not found. Please ensure it exists.")
     except Exception as e:
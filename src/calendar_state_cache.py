@@ -0,0 +1,143 @@
+# =============================================================================
+# calendar_state_cache.py
+# -----------------------------------------------------------------------------
+# Local cache of Google Calendar events kept current with sync tokens.
+# The first run does a full sync and stores the calendar's events together
+# with the API's nextSyncToken in a JSON file. Later runs only fetch the
+# changes since that token; when the server rejects it (410 Gone) the cache
+# is cleared and a full resync is done.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Sync tokens cannot be combined with timeMin/timeMax/q filters, so the
+#     cache holds the whole calendar and windows are filtered locally.
+#   - Deleted events are kept (status 'cancelled') so callers can see them.
+#     The change feed may report a deletion as a bare {id, status}; the cache
+#     keeps the fields it already knew (also across a full resync) and looks
+#     up the rest once, so a returning shift is restored by its iCalUID
+#     instead of re-inserted, which the API rejects as a duplicate.
+#   - Used by calendar_builder.py and delete_calendar_events.py.
+# =============================================================================
+
+import json
+import os
+
+from googleapiclient.errors import HttpError
+
+CALENDAR_STATE_FILE = "calendar_state.json"
+
+
+def event_start(event):
+    """The event's start dateTime (or all-day date), '' when a bare deletion carries none."""
+    start = event.get('start', {})
+    return start.get('dateTime', start.get('date', ''))
+
+
+def event_date(event):
+    """Local date (YYYY-MM-DD) an event starts on."""
+    return event_start(event)[:10]
+
+
+def events_between(events, first_date, last_date, include_cancelled=False):
+    """
+    Events starting between first_date and last_date (inclusive, YYYY-MM-DD strings), sorted by start.
+    With include_cancelled, deleted events whose start is unknown are kept too (first), as long as
+    their iCalUID is, so a returning shift can still be matched to them.
+    """
+    selected = [
+        event for event in events
+        if (first_date <= event_date(event) <= last_date
+            and (include_cancelled or event.get('status') != 'cancelled'))
+        or (include_cancelled and event.get('status') == 'cancelled'
+            and not event_date(event) and event.get('iCalUID'))
+    ]
+    return sorted(selected, key=event_start)
+
+
+class CalendarStateCache:
+    """
+    JSON-backed {calendar_id: {'sync_token': str, 'events': {event_id: event}}} store.
+    """
+
+    def __init__(self, path=CALENDAR_STATE_FILE):
+        self.path = path
+        self._state = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Ignoring unreadable calendar state cache {path}: {e}")
+
+    def _fetch(self, service, calendar_id, sync_token=None):
+        """Fetch all pages of a full (no token) or incremental (token) sync. Returns (events, next_sync_token)."""
+        events = []
+        page_token = None
+        while True:
+            params = {
+                'calendarId': calendar_id,
+                'singleEvents': True,
+                'showDeleted': True,
+                'maxResults': 2500,
+                'pageToken': page_token,
+            }
+            if sync_token:
+                params['syncToken'] = sync_token
+            response = service.events().list(**params).execute()
+            events.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return events, response.get('nextSyncToken')
+
+    def _lookup_deleted(self, service, calendar_id, event):
+        """Fill in a bare deletion (iCalUID, times) from events().get(); returns it unchanged if that fails."""
+        try:
+            return {**event, **service.events().get(calendarId=calendar_id, eventId=event['id']).execute()}
+        except HttpError as error:
+            print(f"WARNING: Could not look up deleted event {event['id']}: {error}")
+            return event
+
+    def sync(self, service, calendar_id):
+        """Bring the cached copy of calendar_id up to date and return all its events."""
+        state = self._state.setdefault(calendar_id, {'sync_token': None, 'events': {}})
+        sync_token = state.get('sync_token')
+
+        known = state['events']
+        changes = None
+        if sync_token:
+            try:
+                changes, next_token = self._fetch(service, calendar_id, sync_token)
+                print(f"Calendar state cache: {len(changes)} change(s) since last sync")
+            except HttpError as error:
+                if error.resp.status != 410:
+                    raise
+                print("Calendar sync token expired; doing a full resync.")
+
+        if changes is None:
+            state['events'] = {}
+            changes, next_token = self._fetch(service, calendar_id)
+            print(f"Calendar state cache: full sync fetched {len(changes)} event(s)")
+
+        for event in changes:
+            # Deletions may arrive as a bare {id, status}; keep the fields we already knew
+            event = {**known.get(event['id'], {}), **event}
+            if event.get('status') == 'cancelled' and not event.get('iCalUID'):
+                event = self._lookup_deleted(service, calendar_id, event)
+            state['events'][event['id']] = event
+        state['sync_token'] = next_token
+        self.save()
+        return list(state['events'].values())
+
+    def save(self):
+        """Write the cache atomically so an interrupted run can't leave a truncated file."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"WARNING: Could not save calendar state cache {self.path}: {e}")
@@ -0,0 +1,162 @@
+# =============================================================================
+# calendar_writer.py
+# -----------------------------------------------------------------------------
+# Paced, retrying writer for individual Google Calendar API calls.
+# A token bucket keeps the request rate at WRITE_REQUESTS_PER_SECOND, a
+# thread pool keeps that many requests in flight, and every call that fails
+# with a rate-limit (403/429) or 5xx error is retried with exponential
+# backoff and full jitter. Latency and retry counts are recorded per request.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - The Calendar API's default quota is about 10 queries per second per
+#     user; WRITE_REQUESTS_PER_SECOND stays just below it.
+#   - TokenBucket is also passed to calendar_batch.execute_batched, which
+#     takes one token per sub-request, so batches share the same budget.
+#     WriteStats records batched sub-requests the same way: each one is an
+#     attempt taking its batch's round-trip time.
+#   - Used by calendar_builder.py and delete_calendar_events.py.
+# =============================================================================
+
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_batch import MAX_RETRIES, RETRY_BASE_DELAY, is_retryable, error_reason, thread_http
+
+WRITE_REQUESTS_PER_SECOND = 8.0  # Sustained write rate
+WRITE_BURST = 8                  # Requests that may go out back-to-back after an idle period
+WRITE_MAX_WORKERS = 4            # Requests in flight at once
+MAX_RETRY_DELAY = 32.0           # Seconds; cap for a single backoff sleep
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() reserves tokens and sleeps until they
+    are covered, so callers asking for more than the burst size just wait longer.
+    """
+
+    def __init__(self, rate=WRITE_REQUESTS_PER_SECOND, capacity=WRITE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take tokens, sleeping while the bucket is in debt. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def backoff_delay(attempt, error=None):
+    """Full-jitter exponential backoff; honors a Retry-After header when the server sends one."""
+    resp = getattr(error, "resp", None)
+    retry_after = resp.get("retry-after") if resp is not None else None
+    if retry_after:
+        try:
+            return min(MAX_RETRY_DELAY, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(MAX_RETRY_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+class WriteStats:
+    """
+    Thread-safe request statistics: latency per attempt and the number of
+    retries each request needed. Shared by CalendarWriter and execute_batched.
+    """
+
+    def __init__(self):
+        self.latencies = []            # Seconds per attempt
+        self.retry_counts = Counter()  # {retries needed: requests}
+        self._lock = threading.Lock()
+
+    def record_latency(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def record_retries(self, retries):
+        with self._lock:
+            self.retry_counts[retries] += 1
+
+    def print_stats(self):
+        """Print request latency percentiles and the retry histogram."""
+        if not self.latencies:
+            return
+        latencies_ms = sorted(latency * 1000 for latency in self.latencies)
+        p95 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))]
+        print(f"Calendar writes: {sum(self.retry_counts.values())} request(s), {len(latencies_ms)} attempt(s)")
+        print(f"  latency ms: mean {statistics.mean(latencies_ms):.0f}, "
+              f"median {statistics.median(latencies_ms):.0f}, p95 {p95:.0f}, max {latencies_ms[-1]:.0f}")
+        print("  retries: " + ", ".join(f"{retries}x: {count}" for retries, count in sorted(self.retry_counts.items())))
+
+
+class CalendarWriter:
+    """
+    Executes calendar requests with pacing, bounded concurrency and retries.
+    Requests are (request_id, factory) pairs as in calendar_batch; the factory
+    builds a fresh HttpRequest for every attempt.
+    """
+
+    def __init__(self, rate_limiter=None, max_workers=WRITE_MAX_WORKERS, max_retries=MAX_RETRIES, http_factory=None):
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.http_factory = http_factory
+        self.stats = WriteStats()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def execute(self, factory):
+        """Run one request, retrying rate-limit/5xx errors. Returns the response or raises the last error."""
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = factory().execute(http=thread_http(self.http_factory))
+            except Exception as error:
+                self.stats.record_latency(time.perf_counter() - started)
+                if not is_retryable(error) or attempt >= self.max_retries:
+                    self.stats.record_retries(attempt)
+                    raise
+                delay = backoff_delay(attempt, error)
+                print(f"Calendar API {error.resp.status} {error_reason(error)} - retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.stats.record_latency(time.perf_counter() - started)
+            self.stats.record_retries(attempt)
+            return response
+
+    def submit(self, factory):
+        """Queue one request on the writer's thread pool and return a Future of its response."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._pool.submit(self.execute, factory)
+
+    def shutdown(self):
+        """Wait for submitted requests and stop the thread pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def print_stats(self):
+        """Print request latency percentiles and the retry histogram."""
+        self.stats.print_stats()
@@ -0,0 +1,110 @@
+# =============================================================================
+# canvas_capture.py
+# -----------------------------------------------------------------------------
+# Screenshot capture of the Flutter canvas.
+# The 'cdp' backend calls Chrome DevTools Page.captureScreenshot directly with
+# a clip rectangle, so the browser only encodes (and sends) the schedule
+# content, in PNG or WebP and at an optional scale. The 'webdriver' backend is
+# the WebDriver element screenshot used before: the whole canvas as PNG.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Controlled by the CAPTURE_* settings in schedule_extractor_config.py.
+#   - image_preprocessing.capture_clip()/capture_scale() describe the frames
+#     produced here, so cropping, ROI boxes and dHash aren't applied twice.
+#   - Clip boxes are in canvas pixels like CROP_COORDINATES; they are divided
+#     by devicePixelRatio because DevTools clips in CSS pixels.
+#   - A failed DevTools capture switches only that driver to WebDriver
+#     screenshots; concurrent sessions keep using DevTools.
+# =============================================================================
+
+import base64
+import io
+
+from PIL import Image
+
+from image_preprocessing import capture_clip, capture_scale, crop_image
+from schedule_extractor_utils import get_element_rect
+from schedule_extractor_config import (
+    CAPTURE_BACKEND, CAPTURE_FORMAT, CAPTURE_WEBP_QUALITY, CAPTURE_OPTIMIZE_FOR_SPEED
+)
+
+def cdp_capture_available(driver):
+    """False once a DevTools capture has failed on this driver."""
+    return not getattr(driver, 'cdp_capture_unavailable', False)
+
+
+def capture_format():
+    """File format of captured frames: the configured one for CDP, always PNG for WebDriver screenshots."""
+    return CAPTURE_FORMAT if CAPTURE_BACKEND == 'cdp' else 'png'
+
+
+def frame_filename(step_name):
+    """File name of a captured frame, with the extension of the capture format."""
+    return f"{step_name}_canvas.{capture_format()}"
+
+
+def capture_cdp(driver, element, clip=None, scale=1.0, image_format='png', quality=CAPTURE_WEBP_QUALITY):
+    """
+    Encoded image bytes of element, or of its clip box (left, top, right, bottom in canvas
+    pixels), captured with Page.captureScreenshot.
+    """
+    left, top, width, height, ratio = get_element_rect(driver, element)
+    if clip:
+        clip_left, clip_top, clip_right, clip_bottom = (value / ratio for value in clip)
+        clip_right, clip_bottom = min(clip_right, width), min(clip_bottom, height)
+        region = {"x": left + clip_left, "y": top + clip_top,
+                  "width": clip_right - clip_left, "height": clip_bottom - clip_top}
+    else:
+        region = {"x": left, "y": top, "width": width, "height": height}
+    region["scale"] = scale
+    params = {"format": image_format, "clip": region}
+    if image_format != 'png':
+        params["quality"] = quality
+    if CAPTURE_OPTIMIZE_FOR_SPEED:
+        params["optimizeForSpeed"] = True
+    return base64.b64decode(driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"])
+
+
+def _clip_element_png(png_bytes, clip, scale, image_format):
+    """Give a full-canvas WebDriver screenshot the same clip, scale and format as a CDP frame."""
+    image = Image.open(io.BytesIO(png_bytes))
+    if clip:
+        image = crop_image(image, clip)
+    if scale != 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format=image_format.upper(), **({"lossless": True} if image_format == 'webp' else {}))
+    return output.getvalue()
+
+
+def capture_frame(element, driver=None):
+    """
+    Capture one frame of the canvas for OCR with the configured backend.
+    Returns encoded bytes in capture_format(), clipped to capture_clip() and scaled by capture_scale().
+    """
+    driver = driver or element.parent
+    if CAPTURE_BACKEND != 'cdp':
+        return element.screenshot_as_png
+    if cdp_capture_available(driver):
+        try:
+            return capture_cdp(driver, element, capture_clip(), capture_scale(), capture_format())
+        except Exception as e:
+            driver.cdp_capture_unavailable = True
+            print(f"WARNING: DevTools capture failed ({e}); using WebDriver screenshots for this browser from now on")
+    return _clip_element_png(element.screenshot_as_png, capture_clip(), capture_scale(), capture_format())
+
+
+def capture_full_canvas(element, driver=None):
+    """PNG of the whole canvas at its native size (for calibrating coordinates)."""
+    driver = driver or element.parent
+    if CAPTURE_BACKEND == 'cdp' and cdp_capture_available(driver):
+        try:
+            return capture_cdp(driver, element)
+        except Exception as e:
+            print(f"WARNING: DevTools capture failed ({e}); using a WebDriver screenshot")
+    return element.screenshot_as_png
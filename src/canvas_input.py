@@ -0,0 +1,159 @@
+# =============================================================================
+# canvas_input.py
+# -----------------------------------------------------------------------------
+# Mouse input for the Flutter canvas through Chrome DevTools.
+# Clicks and wheel scrolls are sent as Input.dispatchMouseEvent commands over
+# one persistent DevTools websocket instead of one execute_script (a WebDriver
+# HTTP round trip, a getBoundingClientRect and synthetic page JavaScript
+# events) per event. The canvas position is looked up once and cached, and a
+# whole gesture (e.g. press + release, or several wheel steps) is written to
+# the socket in one go before the replies are read.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Controlled by the INPUT_* settings in schedule_extractor_config.py.
+#   - The websocket needs websocket-client (pip install websocket-client).
+#     Without it, or when the connection fails, every event is sent with
+#     driver.execute_cdp_cmd, which still skips the page JavaScript.
+#   - Coordinates are CSS pixels relative to the canvas' top-left corner,
+#     as in click_canvas_at and scroll_canvas_with_wheel.
+#   - DevTools events are dispatched like real input: they hit whatever is
+#     on top at that point of the window, normally the full-window canvas.
+# =============================================================================
+
+import json
+
+from schedule_extractor_config import INPUT_PERSISTENT_CONNECTION, INPUT_TIMEOUT
+from schedule_extractor_utils import get_element_rect
+
+
+def mouse_click(x, y, button='left'):
+    """Input.dispatchMouseEvent parameters for a press and release at viewport point (x, y)."""
+    return [
+        {"type": "mousePressed", "x": x, "y": y, "button": button, "buttons": 1, "clickCount": 1},
+        {"type": "mouseReleased", "x": x, "y": y, "button": button, "buttons": 0, "clickCount": 1},
+    ]
+
+
+def mouse_wheel(x, y, delta_y, delta_x=0):
+    """Input.dispatchMouseEvent parameters for one wheel event at viewport point (x, y)."""
+    return [{"type": "mouseWheel", "x": x, "y": y, "deltaX": delta_x, "deltaY": delta_y}]
+
+
+class CanvasInput:
+    """
+    DevTools mouse input for one driver. Keeps the websocket open and caches the
+    canvas origin; call invalidate() if the canvas moves (e.g. the window is resized).
+    """
+
+    def __init__(self, driver, persistent=INPUT_PERSISTENT_CONNECTION, timeout=INPUT_TIMEOUT):
+        self.driver = driver
+        self.timeout = timeout
+        self._origin = None
+        self._element_id = None
+        self._next_id = 0
+        self._ws = self._connect() if persistent else None
+
+    def _connect(self):
+        """Open a websocket to the page's DevTools endpoint, or return None to use execute_cdp_cmd."""
+        try:
+            import websocket
+        except ImportError:
+            print("websocket-client is not installed; sending canvas input with execute_cdp_cmd")
+            return None
+        try:
+            address = self.driver.capabilities['goog:chromeOptions']['debuggerAddress']
+            target_id = self.driver.execute_cdp_cmd("Target.getTargetInfo", {})["targetInfo"]["targetId"]
+            # Chrome refuses DevTools websockets that send an Origin header unless
+            # it was started with --remote-allow-origins, so don't send one
+            ws = websocket.create_connection(f"ws://{address}/devtools/page/{target_id}",
+                                             timeout=self.timeout, suppress_origin=True)
+        except Exception as e:
+            print(f"WARNING: Could not open a DevTools connection ({e}); sending canvas input with execute_cdp_cmd")
+            return None
+        print(f"DevTools input connection open to {address}")
+        return ws
+
+    def origin(self, element):
+        """Viewport position of the canvas' top-left corner, looked up once per element."""
+        if self._origin is None or element.id != self._element_id:
+            self._origin = tuple(get_element_rect(self.driver, element)[:2])
+            self._element_id = element.id
+        return self._origin
+
+    def invalidate(self):
+        """Forget the cached canvas position."""
+        self._origin = None
+
+    def dispatch(self, events):
+        """Send a sequence of Input.dispatchMouseEvent parameter dicts, in order."""
+        if self._ws is not None:
+            try:
+                self._send_all(events)
+                return
+            except Exception as e:
+                print(f"WARNING: DevTools input connection failed ({e}); falling back to execute_cdp_cmd")
+                self.close()
+        for params in events:
+            self.driver.execute_cdp_cmd("Input.dispatchMouseEvent", params)
+
+    def _send_all(self, events):
+        """Write every command, then wait for all replies: one round trip for the whole gesture."""
+        pending = set()
+        for params in events:
+            self._next_id += 1
+            pending.add(self._next_id)
+            self._ws.send(json.dumps({"id": self._next_id, "method": "Input.dispatchMouseEvent", "params": params}))
+        while pending:
+            message = json.loads(self._ws.recv())
+            if message.get("id") not in pending:
+                continue  # Protocol events or replies meant for nobody
+            pending.discard(message["id"])
+            if "error" in message:
+                raise RuntimeError(f"Input.dispatchMouseEvent failed: {message['error'].get('message')}")
+
+    def click(self, element, x, y):
+        """Click at (x, y) relative to the canvas."""
+        left, top = self.origin(element)
+        self.dispatch(mouse_click(left + x, top + y))
+
+    def wheel(self, element, x, y, delta_y, steps=1):
+        """Send steps wheel events of delta_y at (x, y) relative to the canvas, as one gesture."""
+        left, top = self.origin(element)
+        self.dispatch(mouse_wheel(left + x, top + y, delta_y) * steps)
+
+    def gesture(self, element, *actions):
+        """
+        Send several actions in one call. Each action is ('click', x, y) or
+        ('wheel', x, y, delta_y), with coordinates relative to the canvas.
+        """
+        left, top = self.origin(element)
+        events = []
+        for kind, x, y, *args in actions:
+            if kind == 'click':
+                events += mouse_click(left + x, top + y)
+            elif kind == 'wheel':
+                events += mouse_wheel(left + x, top + y, *args)
+            else:
+                raise ValueError(f"Unknown gesture action: {kind}")
+        self.dispatch(events)
+
+    def close(self):
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+            self._ws = None
+
+
+def get_canvas_input(driver):
+    """The driver's CanvasInput, created on first use."""
+    canvas_input = getattr(driver, 'canvas_input', None)
+    if canvas_input is None:
+        canvas_input = driver.canvas_input = CanvasInput(driver)
+    return canvas_input
@@ -8,31 +8,121 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from calendar_batch import execute_batched, make_http_factory
+from calendar_builder import EVENT_SOURCE_TAG, is_our_event
+from calendar_state_cache import CalendarStateCache, CALENDAR_STATE_FILE, events_between
+from calendar_writer import TokenBucket, WriteStats, WRITE_MAX_WORKERS
+
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
 
-def delete_all_events_in_range(service, calendar_id, date_range_days=90):
-    """Delete ALL events within a date range (use with caution!)"""
-    try:
-        # Calculate date range
-        now = datetime.now()
-        time_min = (now - timedelta(days=30)).isoformat() + 'Z'
-        time_max = (now + timedelta(days=date_range_days)).isoformat() + 'Z'
-        
-        print(f"Searching for ALL events from {(now - timedelta(days=30)).strftime('%Y-%m-%d')} to {(now + timedelta(days=date_range_days)).strftime('%Y-%m-%d')}")
-        
-        # Get all events in the time range (no search query)
+DELETE_CONCURRENCY = WRITE_MAX_WORKERS  # Delete batches in flight at once
+
+
+def event_query_params(summary=None, tagged_only=False):
+    """
+    events().list() parameters that let the server narrow the fetch.
+    q is a free-text match (summary, description, location, ...), so results still go through matches_filters().
+    A sync token can't be combined with them, so the cached path (cached_events_in_window) only uses matches_filters().
+    """
+    params = {}
+    if summary:
+        params['q'] = summary
+    if tagged_only:
+        params['privateExtendedProperty'] = [f"{key}={value}" for key, value in EVENT_SOURCE_TAG.items()]
+    return params
+
+
+def matches_filters(event, summary=None, tagged_only=False):
+    """Exact local check: the title equals summary and, with tagged_only, calendar_builder created the event."""
+    if summary and event.get('summary', '') != summary:
+        return False
+    if tagged_only and not is_our_event(event):
+        return False
+    return True
+
+
+def list_events_in_window(service, calendar_id, time_min, time_max, summary=None, tagged_only=False):
+    """Lists the events between time_min and time_max (RFC3339) matching the filters, following nextPageToken."""
+    events = []
+    page_token = None
+    while True:
         events_result = service.events().list(
             calendarId=calendar_id,
             timeMin=time_min,
             timeMax=time_max,
             singleEvents=True,
             orderBy='startTime',
-            maxResults=2500
+            maxResults=2500,
+            pageToken=page_token,
+            **event_query_params(summary, tagged_only)
         ).execute()
+        events.extend(event for event in events_result.get('items', []) if matches_filters(event, summary, tagged_only))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return events
+
+
+def cached_events_in_window(state_cache, service, calendar_id, first_date, last_date, summary=None, tagged_only=False):
+    """
+    The events list_events_in_window() selects, taken from a CalendarStateCache instead of a filtered
+    events().list(): the cache holds the whole calendar, so the dates (YYYY-MM-DD, inclusive) and
+    matches_filters() are applied locally.
+    """
+    return [
+        event for event in events_between(state_cache.sync(service, calendar_id), first_date, last_date)
+        if matches_filters(event, summary, tagged_only)
+    ]
+
+
+def delete_events(service, calendar_id, events, max_concurrency=DELETE_CONCURRENCY, http_factory=None, rate_limiter=None):
+    """
+    Deletes events with batched requests, max_concurrency batches at a time.
+    rate_limiter (default: a new TokenBucket) keeps the deletes within the write quota.
+    Returns (deleted_count, failed_count). An event that is already gone counts as deleted.
+    """
+    by_id = {event['id']: event for event in events}
+    requests = [
+        (event_id, lambda event_id=event_id: service.events().delete(calendarId=calendar_id, eventId=event_id))
+        for event_id in by_id
+    ]
+    results = execute_batched(service, requests, max_concurrency=max_concurrency, http_factory=http_factory,
+                              rate_limiter=rate_limiter or TokenBucket(), stats=WriteStats())
+
+    deleted_count = 0
+    failed_count = 0
+    for event_id, (_, error) in results.items():
+        event = by_id[event_id]
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        summary = event.get('summary', 'No Title')
+        if error is None or (isinstance(error, HttpError) and error.resp.status == 410):
+            print(f"✓ Deleted: {summary} - {start}")
+            deleted_count += 1
+        else:
+            print(f"✗ Failed to delete event {event_id}: {error}")
+            failed_count += 1
+    return deleted_count, failed_count
+
+
+def filter_label(summary=None, tagged_only=False):
+    """Describes the events selected by the filters, e.g. "ALL" or "'THD' tagged", for prompts."""
+    label = f"'{summary}'" if summary else "ALL"
+    return f"{label} tagged" if tagged_only else label
+
+
+def delete_all_events_in_range(service, calendar_id, date_range_days=90, http_factory=None, summary=None, tagged_only=False):
+    """Delete all events (or only those titled summary / tagged by calendar_builder) within a date range (use with caution!)"""
+    try:
+        # Calculate date range
+        now = datetime.now()
+        time_min = (now - timedelta(days=30)).isoformat() + 'Z'
+        time_max = (now + timedelta(days=date_range_days)).isoformat() + 'Z'
+        
+        print(f"Searching for {filter_label(summary, tagged_only)} events from {(now - timedelta(days=30)).strftime('%Y-%m-%d')} to {(now + timedelta(days=date_range_days)).strftime('%Y-%m-%d')}")
         
-        events = events_result.get('items', [])
+        # Get the matching events in the time range, every page
+        events = list_events_in_window(service, calendar_id, time_min, time_max, summary, tagged_only)
         
         if not events:
             print("No events found in the specified date range.")
@@ -43,37 +133,22 @@ def delete_all_events_in_range(service, calendar_id, date_range_days=90):
         # Show events and ask for confirmation
         for i, event in enumerate(events[:10], 1):  # Show first 10 events
             start = event['start'].get('dateTime', event['start'].get('date'))
-            summary = event.get('summary', 'No Title')
+            title = event.get('summary', 'No Title')
             ical_uid = event.get('iCalUID', 'No iCalUID')
-            print(f"  {i}. {summary} - {start} (iCalUID: {ical_uid[:8]}...)")
+            print(f"  {i}. {title} - {start} (iCalUID: {ical_uid[:8]}...)")
         
         if len(events) > 10:
             print(f"  ... and {len(events) - 10} more events")
         
-        # Ask for confirmation
-        confirm = input(f"\nDo you want to delete ALL {len(events)} events? (yes/no): ").lower().strip()
+        # Ask for confirmation; the label comes from the filters, never from a listed event
+        label = filter_label(summary, tagged_only)
+        confirm = input(f"\nDo you want to delete {label} {len(events)} events? (yes/no): ").lower().strip()
         
         if confirm not in ['yes', 'y']:
             print("Deletion cancelled.")
             return
         
-        # Delete events
-        deleted_count = 0
-        failed_count = 0
-        
-        for event in events:
-            try:
-                service.events().delete(calendarId=calendar_id, eventId=event['id']).execute()
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                summary = event.get('summary', 'No Title')
-                print(f"✓ Deleted: {summary} - {start}")
-                deleted_count += 1
-            except HttpError as error:
-                print(f"✗ Failed to delete event {event['id']}: {error}")
-                failed_count += 1
-            except Exception as e:
-                print(f"✗ Unexpected error deleting event {event['id']}: {e}")
-                failed_count += 1
+        deleted_count, failed_count = delete_events(service, calendar_id, events, http_factory=http_factory)
         
         print(f"\n--- DELETION SUMMARY ---")
         print(f"Events deleted: {deleted_count}")
@@ -84,27 +159,28 @@ def delete_all_events_in_range(service, calendar_id, date_range_days=90):
         print(f"Error searching for events: {e}")
 
 
-def list_all_events_in_range(service, calendar_id, date_range_days=90):
-    """List ALL events within a date range"""
+def list_all_events_in_range(service, calendar_id, date_range_days=90, state_cache=None, summary=None, tagged_only=False):
+    """
+    List all events (or only those titled summary / tagged by calendar_builder) within a date range.
+    With a state_cache only changes since the last run are fetched and the filters are applied
+    locally (see cached_events_in_window); both paths list the same events.
+    """
     try:
-        # Calculate date range
-        now = datetime.now()
-        time_min = (now - timedelta(days=30)).isoformat() + 'Z'
-        time_max = (now + timedelta(days=date_range_days)).isoformat() + 'Z'
+        # Calculate date range; whole days, so the cached and the listed path cover the same events
+        today = datetime.now().date()
+        first_date = (today - timedelta(days=30)).isoformat()
+        last_date = (today + timedelta(days=date_range_days)).isoformat()
         
-        print(f"Searching for ALL events from {(now - timedelta(days=30)).strftime('%Y-%m-%d')} to {(now + timedelta(days=date_range_days)).strftime('%Y-%m-%d')}")
+        print(f"Searching for {filter_label(summary, tagged_only)} events from {first_date} to {last_date}")
         
-        # Get all events in the time range (no search query)
-        events_result = service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy='startTime',
-            maxResults=2500
-        ).execute()
-        
-        events = events_result.get('items', [])
+        if state_cache is not None:
+            # Incremental sync, then select the date range and filters locally
+            events = cached_events_in_window(state_cache, service, calendar_id, first_date, last_date, summary, tagged_only)
+        else:
+            # Let the API filter the time range, then match exactly
+            time_min = f"{first_date}T00:00:00Z"
+            time_max = f"{(today + timedelta(days=date_range_days + 1)).isoformat()}T00:00:00Z"
+            events = list_events_in_window(service, calendar_id, time_min, time_max, summary, tagged_only)
         
         if not events:
             print("No events found.")
@@ -114,10 +190,10 @@ def list_all_events_in_range(service, calendar_id, date_range_days=90):
         
         for i, event in enumerate(events, 1):
             start = event['start'].get('dateTime', event['start'].get('date'))
-            summary = event.get('summary', 'No Title')
+            title = event.get('summary', 'No Title')
             ical_uid = event.get('iCalUID', 'No iCalUID')
             description = event.get('description', '')
-            print(f"  {i}. {summary} - {start}")
+            print(f"  {i}. {title} - {start}")
             print(f"     iCalUID: {ical_uid}")
             if description:
                 print(f"     Description: {description}")
@@ -132,8 +208,10 @@ def main():
     parser = argparse.ArgumentParser(description="Delete or list THD events from Google Calendar.")
     parser.add_argument('--calendar', type=str, help='Google Calendar ID (e.g., primary or your_email@group.calendar.google.com)')
     parser.add_argument('--action', type=str, choices=['list', 'delete'], default='list', help='Action to perform: list or delete events')
-    parser.add_argument('--summary', type=str, default='THD', help='Event summary to search for (default: THD)')
+    parser.add_argument('--summary', type=str, default='THD', help='Exact event summary to search for, or ALL (default: THD)')
+    parser.add_argument('--tagged-only', action='store_true', help='Only events created by calendar_builder (private source tag)')
     parser.add_argument('--days', type=int, default=90, help='Number of days in the future to search (default: 90)')
+    parser.add_argument('--no-cache', action='store_true', help=f'List straight from the API instead of the incremental {CALENDAR_STATE_FILE} cache')
     args = parser.parse_args()
 
     creds = None
@@ -169,18 +247,18 @@ def main():
                 print(f"Error accessing calendar: {error}")
                 return
 
+        state_cache = None if args.no_cache else CalendarStateCache(CALENDAR_STATE_FILE)
+
+        summary = None if args.summary == 'ALL' else args.summary
+
         if args.action == 'list':
-            if args.summary == 'ALL':
-                list_all_events_in_range(service, calendar_id, args.days)
-            else:
-                print(f"Searching specifically for '{args.summary}' events...")
-                list_all_events_in_range(service, calendar_id, args.days)
+            if summary:
+                print(f"Searching specifically for '{summary}' events...")
+            list_all_events_in_range(service, calendar_id, args.days, state_cache, summary, args.tagged_only)
         elif args.action == 'delete':
-            if args.summary == 'ALL':
-                delete_all_events_in_range(service, calendar_id, args.days)
-            else:
-                print(f"Will delete events containing '{args.summary}' in title...")
-                delete_all_events_in_range(service, calendar_id, args.days)
+            if summary:
+                print(f"Will delete events titled '{summary}'...")
+            delete_all_events_in_range(service, calendar_id, args.days, make_http_factory(creds), summary, args.tagged_only)
 
     except HttpError as error:
         print(f'An HTTP error occurred: {error}')
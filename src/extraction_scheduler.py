@@ -0,0 +1,189 @@
+# =============================================================================
+# extraction_scheduler.py
+# -----------------------------------------------------------------------------
+# Extracts the schedules of many accounts at once. Every account runs in its
+# own headless browser with its own Chrome profile and output folder; the
+# number of concurrent sessions is sized from the CPU cores and free memory
+# of the host, and the results are collected per account.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Usage:
+#   python extraction_scheduler.py [accounts.csv]     # extract every account
+#   python extraction_scheduler.py --login <account>  # log one profile in (headed)
+#
+# Notes:
+#   - Headless sessions only run on a saved WFT session; an account whose
+#     session has expired is reported as 'login required' and skipped.
+#   - Sessions run on threads (the browsers are separate processes) and share
+#     one OCR process pool, so Tesseract isn't started once per session.
+#   - Other Chrome processes on the host are left alone.
+# =============================================================================
+
+import csv
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psutil
+
+from browser_process import quit_browser
+from calendar_builder import read_structured_csv, valid_shifts
+from ocr_engine import make_ocr_executor
+from run_context import RunContext, remove_stale_workspaces
+from schedule_extractor import launch_browser, has_valid_session, handle_thd_login, snapshot_schedule_entries
+from schedule_extractor_config import (
+    WEB_APP_URL, OCR_OUTPUT_FILENAME, ACCOUNTS_FILE, ACCOUNT_PROFILES_DIR, ACCOUNT_OUTPUT_DIR,
+    SCHEDULER_CPUS_PER_SESSION, SCHEDULER_MEMORY_PER_SESSION_MB, SCHEDULER_MAX_SESSIONS
+)
+
+# undetected_chromedriver patches the chromedriver binary while starting a browser,
+# so browsers are launched one at a time and only the extraction runs in parallel.
+_launch_lock = threading.Lock()
+
+
+def read_accounts(accounts_file=ACCOUNTS_FILE):
+    """Account names from the 'account' column of accounts_file, blank rows and duplicates skipped."""
+    accounts = []
+    with open(accounts_file, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            account = (row.get('account') or '').strip()
+            if account and account not in accounts:
+                accounts.append(account)
+    return accounts
+
+
+def account_dirs(account, profiles_dir=ACCOUNT_PROFILES_DIR, output_dir=ACCOUNT_OUTPUT_DIR):
+    """(Chrome profile dir, output dir) for an account; the name is made safe for use as a folder."""
+    folder = re.sub(r'[^A-Za-z0-9_.-]', '_', account)
+    return os.path.join(profiles_dir, folder), os.path.join(output_dir, folder)
+
+
+def max_concurrent_sessions(num_accounts, cpus_per_session=SCHEDULER_CPUS_PER_SESSION,
+                            memory_per_session_mb=SCHEDULER_MEMORY_PER_SESSION_MB,
+                            max_sessions=SCHEDULER_MAX_SESSIONS):
+    """Number of browser sessions this host can run at once, from its CPU count and available memory."""
+    cpu_limit = (psutil.cpu_count(logical=True) or 1) // cpus_per_session
+    memory_limit = psutil.virtual_memory().available // (memory_per_session_mb * 1024 * 1024)
+    sessions = min(num_accounts, cpu_limit, memory_limit, max_sessions or num_accounts)
+    print(f"Session limits: {cpu_limit} by CPU, {memory_limit} by memory, "
+          f"{max_sessions or 'no'} fixed cap, {num_accounts} account(s) -> {max(1, sessions)}")
+    return max(1, sessions)
+
+
+def extract_account(account, ocr_executor=None):
+    """
+    Run one headless extraction for account. Never raises; returns a result dict with
+    the account, status ('ok', 'login required' or 'failed'), shift count, published
+    structured CSV, elapsed seconds and error message.
+    """
+    profile_dir, output_dir = account_dirs(account)
+    context = RunContext(output_dir=output_dir, profile_dir=profile_dir)
+    result = {'account': account, 'status': 'failed', 'shifts': 0, 'structured_csv': None,
+              'output_dir': output_dir, 'seconds': 0.0, 'error': ''}
+    started = time.perf_counter()
+    driver = None
+    try:
+        remove_stale_workspaces(output_dir)
+        context.create()
+        with _launch_lock:
+            driver = launch_browser(headless=True, user_data_dir=context.profile_dir)
+        driver.get(WEB_APP_URL)
+        if not has_valid_session(driver):
+            result['status'] = 'login required'
+            result['error'] = f"run: python extraction_scheduler.py --login {account}"
+            return result
+
+        _, _, structured_csv_path = snapshot_schedule_entries(driver, context, ocr_executor=ocr_executor)
+        result['structured_csv'] = context.output_path(OCR_OUTPUT_FILENAME)
+        result['shifts'] = sum(1 for _ in valid_shifts(read_structured_csv(structured_csv_path)))
+        result['status'] = 'ok'
+    except Exception as e:
+        result['error'] = str(e)
+        print(f"[{account}] extraction failed: {e}")
+    finally:
+        if driver is not None:
+            quit_browser(driver)
+        context.close()
+        result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def run_accounts(accounts, max_sessions=None):
+    """
+    Extract every account, max_sessions at a time (sized from the host when None).
+    Returns {account: result} in the order the accounts were given.
+    """
+    if max_sessions is None:
+        max_sessions = max_concurrent_sessions(len(accounts))
+    print(f"Extracting {len(accounts)} account(s) with {max_sessions} concurrent browser session(s)")
+
+    started = time.perf_counter()
+    ocr_executor = make_ocr_executor()
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_sessions) as pool:
+            futures = {pool.submit(extract_account, account, ocr_executor): account for account in accounts}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['account']] = result
+                print(f"[{result['account']}] {result['status']} in {result['seconds']:.1f}s "
+                      f"({result['shifts']} shift(s))")
+    finally:
+        if ocr_executor is not None:
+            ocr_executor.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print(f"Extracted {len(accounts)} account(s) in {elapsed:.1f}s "
+          f"({len(accounts) / elapsed * 60:.1f} accounts/min)")
+    return {account: results[account] for account in accounts}
+
+
+def print_results(results):
+    """One line per account: status, shifts, time and where the output went (or what went wrong)."""
+    print("\n--- EXTRACTION RESULTS ---")
+    for result in results.values():
+        detail = result['structured_csv'] if result['status'] == 'ok' else result['error']
+        print(f"{result['account']:<24} {result['status']:<15} {result['shifts']:>3} shift(s) "
+              f"{result['seconds']:>6.1f}s  {detail}")
+
+
+def login_account(account):
+    """Open a headed browser on the account's profile so the user can log in once for later headless runs."""
+    profile_dir, _ = account_dirs(account)
+    driver = launch_browser(headless=False, user_data_dir=profile_dir)
+    try:
+        driver.get(WEB_APP_URL)
+        if has_valid_session(driver):
+            print(f"[{account}] profile is already logged in.")
+        else:
+            handle_thd_login(driver)
+            print(f"[{account}] session saved in {profile_dir}")
+    finally:
+        quit_browser(driver)
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--login':
+        login_account(sys.argv[2])
+        return
+
+    accounts_file = sys.argv[1] if len(sys.argv) > 1 else ACCOUNTS_FILE
+    accounts = read_accounts(accounts_file)
+    if not accounts:
+        print(f"No accounts found in {accounts_file}")
+        sys.exit(1)
+    results = run_accounts(accounts)
+    print_results(results)
+    if any(result['status'] != 'ok' for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
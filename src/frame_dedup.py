@@ -0,0 +1,87 @@
+# =============================================================================
+# frame_dedup.py
+# -----------------------------------------------------------------------------
+# Perceptual-hash detection of repeated canvas frames.
+# Every captured detail view is reduced to a difference hash (dHash): the
+# date strip of the card is shrunk to a (size+1) x size grayscale thumbnail
+# and each bit records whether a pixel is brighter than its right-hand
+# neighbour. Two consecutive frames showing the same date show the same view,
+# so a scroll that didn't move the list is caught before it costs a Tesseract run.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Controlled by the FRAME_DEDUP_* settings in schedule_extractor_config.py.
+#   - Only the date strip is hashed: the rest of the card is dominated by its
+#     layout, and the same shift on consecutive days hashes a few bits apart.
+#   - Only consecutive frames are compared; a date never shows twice in a row.
+#   - A skipped frame means a day was not scanned. Callers pass a list as
+#     skipped and must not treat the missing days as days without a shift.
+# =============================================================================
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from image_preprocessing import frame_box
+from schedule_extractor_config import (
+    ENABLE_FRAME_DEDUP, FRAME_DEDUP_BOX, FRAME_DEDUP_HASH_SIZE, FRAME_DEDUP_MAX_DISTANCE, FRAME_DEDUP_ACTION
+)
+
+
+def dhash(image_bytes, hash_size=FRAME_DEDUP_HASH_SIZE, box=FRAME_DEDUP_BOX):
+    """Difference hash of the box (canvas pixels) of encoded image bytes, as a hash_size*hash_size bit integer."""
+    image = Image.open(io.BytesIO(image_bytes))
+    if box:
+        image = image.crop(frame_box(box))
+    thumbnail = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash_a, hash_b):
+    """Number of differing bits between two hashes."""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+def dedup_frames(frames, max_distance=FRAME_DEDUP_MAX_DISTANCE, action=FRAME_DEDUP_ACTION,
+                 enabled=ENABLE_FRAME_DEDUP, skipped=None):
+    """
+    Filter a stream of (index, png_filename, image_bytes) frames.
+    A frame within max_distance bits of the previous frame is dropped
+    (action 'skip') or passed on with a warning (action 'flag').
+    The file name of every dropped frame is appended to the skipped list.
+    """
+    if not enabled:
+        yield from frames
+        return
+
+    previous = None
+    dropped = 0
+    for index, png_filename, image_bytes in frames:
+        try:
+            frame_hash = dhash(image_bytes)
+        except Exception as e:
+            print(f"Could not hash {png_filename}: {e}")
+            yield index, png_filename, image_bytes
+            continue
+
+        if previous is not None:
+            distance = hamming_distance(frame_hash, previous[1])
+            if distance <= max_distance:
+                print(f"Frame {png_filename} matches {previous[0]} ({distance} bit(s) apart) - "
+                      f"the scroll or click probably didn't register")
+                if action == 'skip':
+                    dropped += 1
+                    if skipped is not None:
+                        skipped.append(png_filename)
+                    continue
+        previous = (png_filename, frame_hash)
+        yield index, png_filename, image_bytes
+
+    if dropped:
+        print(f"Skipped {dropped} duplicate frame(s) before OCR; their days were not scanned")
@@ -0,0 +1,155 @@
+# =============================================================================
+# image_preprocessing.py
+# -----------------------------------------------------------------------------
+# Image preparation applied to every canvas snapshot before it reaches
+# Tesseract: crop to the schedule content, convert to grayscale, rescale to a
+# target DPI and binarize. Tesseract's run time grows with the pixel count, so
+# handing it only the schedule content is the single biggest OCR speed-up.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Controlled by ENABLE_SCREENSHOT_CROPPING, CROP_COORDINATES,
+#     ENABLE_IMAGE_PREPROCESSING and the OCR_*_DPI settings in
+#     schedule_extractor_config.py. With ENABLE_ROI_OCR the TILE_FIELD_BOXES
+#     are cropped out instead of the single CROP_COORDINATES box.
+#   - Boxes are in canvas pixels. Frames captured over DevTools may already
+#     be clipped to CROP_COORDINATES and scaled (canvas_capture.py);
+#     frame_box() maps a canvas box into such a frame.
+#   - Runs inside the OCR worker processes, so it is parallelized with OCR.
+# =============================================================================
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from schedule_extractor_config import (
+    ENABLE_SCREENSHOT_CROPPING, CROP_COORDINATES, ENABLE_IMAGE_PREPROCESSING,
+    OCR_SOURCE_DPI, OCR_TARGET_DPI, ENABLE_ROI_OCR, TILE_FIELD_BOXES, CAPTURE_BACKEND, CAPTURE_SCALE
+)
+
+
+def capture_clip():
+    """Canvas box that captured frames are clipped to, or None when frames show the whole canvas."""
+    if CAPTURE_BACKEND == 'cdp' and ENABLE_SCREENSHOT_CROPPING:
+        return CROP_COORDINATES
+    return None
+
+
+def capture_scale():
+    """Scale factor of captured frames relative to canvas pixels."""
+    return CAPTURE_SCALE if CAPTURE_BACKEND == 'cdp' else 1.0
+
+
+def frame_box(box):
+    """Translate a (left, top, right, bottom) box in canvas pixels into pixels of a captured frame."""
+    clip, scale = capture_clip(), capture_scale()
+    origin_x, origin_y = clip[:2] if clip else (0, 0)
+    left, top, right, bottom = box
+    return (round((left - origin_x) * scale), round((top - origin_y) * scale),
+            round((right - origin_x) * scale), round((bottom - origin_y) * scale))
+
+
+def preprocessing_signature():
+    """
+    Describe the active preprocessing settings.
+    Included in the OCR cache key so changing a setting invalidates cached text.
+    """
+    parts = []
+    if ENABLE_ROI_OCR:
+        parts.append("roi=" + ",".join(
+            f"{name}:{field['box']}:psm{field['psm']}:{field['whitelist']}" for name, field in TILE_FIELD_BOXES.items()
+        ))
+    elif ENABLE_SCREENSHOT_CROPPING:
+        parts.append("crop=%d,%d,%d,%d" % tuple(CROP_COORDINATES))
+    if ENABLE_IMAGE_PREPROCESSING:
+        parts.append(f"gray,dpi={OCR_SOURCE_DPI}->{OCR_TARGET_DPI},otsu")
+    return ";".join(parts)
+
+
+def ocr_dpi():
+    """Resolution to report to Tesseract so it doesn't guess it for in-memory images."""
+    if ENABLE_IMAGE_PREPROCESSING:
+        return OCR_TARGET_DPI
+    return None
+
+
+def crop_image(image, box=CROP_COORDINATES):
+    """Crop image to box (left, top, right, bottom), clamped to the image bounds."""
+    left, top, right, bottom = box
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(image.width, right), min(image.height, bottom)
+    if right <= left or bottom <= top:
+        print(f"WARNING: Crop box {box} lies outside the {image.width}x{image.height} snapshot; OCR'ing the full frame.")
+        return image
+    return image.crop((left, top, right, bottom))
+
+
+def crop_to_content(image):
+    """Crop a captured frame to CROP_COORDINATES, unless the capture was already clipped to it."""
+    if capture_clip() == CROP_COORDINATES:
+        return image
+    return crop_image(image, frame_box(CROP_COORDINATES))
+
+
+def rescale_to_dpi(image, source_dpi=OCR_SOURCE_DPI, target_dpi=OCR_TARGET_DPI):
+    """Down- or upscale image from source_dpi to target_dpi."""
+    if not source_dpi or source_dpi == target_dpi:
+        return image
+    scale = target_dpi / source_dpi
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    resample = Image.LANCZOS if scale < 1 else Image.BICUBIC
+    return image.resize(size, resample)
+
+
+def otsu_threshold(gray):
+    """Return the Otsu threshold of a uint8 grayscale array."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    omega = np.cumsum(hist) / gray.size
+    mu = np.cumsum(hist * np.arange(256)) / gray.size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between_var = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    return int(np.nanargmax(between_var))
+
+
+def binarize(gray):
+    """
+    Binarize a uint8 grayscale array with Otsu's threshold.
+    The result is always dark text on a light background, which Tesseract prefers.
+    """
+    binary = np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+    if binary.mean() < 128:  # Mostly dark: light text on a dark theme
+        binary = 255 - binary
+    return binary
+
+
+def enhance_for_ocr(image):
+    """Apply the configured grayscale/rescale/binarize steps to an already cropped PIL image."""
+    if ENABLE_IMAGE_PREPROCESSING:
+        # A scaled capture has scaled the screen's DPI along with it
+        image = rescale_to_dpi(image.convert("L"), source_dpi=OCR_SOURCE_DPI * capture_scale())
+        image = Image.fromarray(binarize(np.asarray(image, dtype=np.uint8)))
+    return image
+
+
+def preprocess_for_ocr(image):
+    """Apply the configured crop/grayscale/rescale/binarize steps to a PIL image."""
+    if ENABLE_SCREENSHOT_CROPPING:
+        image = crop_to_content(image)
+    return enhance_for_ocr(image)
+
+
+def load_image_for_ocr(image_bytes):
+    """Decode encoded image bytes and preprocess them for OCR."""
+    return preprocess_for_ocr(Image.open(io.BytesIO(image_bytes)))
+
+
+def load_regions_for_ocr(image_bytes, fields=TILE_FIELD_BOXES):
+    """Decode image bytes once and return {field: preprocessed crop of its box} for ROI OCR."""
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+    return {name: enhance_for_ocr(crop_image(image, frame_box(field['box']))) for name, field in fields.items()}
@@ -0,0 +1,132 @@
+# =============================================================================
+# ocr_backends.py
+# -----------------------------------------------------------------------------
+# OCR backend abstraction.
+# PytesseractBackend shells out to tesseract.exe for every image (a temp-file
+# write plus a traineddata load per call). TesserocrBackend keeps one
+# long-lived Tesseract API handle, loaded once with the configured language,
+# page-segmentation mode and character whitelist, and reuses it per image.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - get_ocr_backend() returns one backend per thread, so every OCR pool
+#     worker (process or thread) loads its engine exactly once.
+#   - OCR_BACKEND = 'auto' uses tesserocr when it is installed and falls back
+#     to pytesseract otherwise.
+# =============================================================================
+
+import os
+import threading
+
+from schedule_extractor_config import (
+    OCR_BACKEND, OCR_LANGUAGE, OCR_PAGE_SEG_MODE, OCR_CHAR_WHITELIST, OCR_TESSDATA_PATH, TESSERACT_PATH
+)
+
+
+class PytesseractBackend:
+    """Runs a new tesseract process per image through pytesseract."""
+
+    name = "pytesseract"
+
+    def __init__(self, language=OCR_LANGUAGE, psm=OCR_PAGE_SEG_MODE, whitelist=OCR_CHAR_WHITELIST):
+        import pytesseract
+        if TESSERACT_PATH and os.path.exists(TESSERACT_PATH):
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+        self._pytesseract = pytesseract
+        self.language = language
+        self.psm = psm
+        self.whitelist = whitelist
+
+    def image_to_string(self, image, psm=None, whitelist=None, dpi=None, extra_config=""):
+        """OCR a PIL image; psm/whitelist override the backend defaults for this call."""
+        args = [f"--psm {self.psm if psm is None else psm}"]
+        whitelist = self.whitelist if whitelist is None else whitelist
+        if whitelist:
+            args.append(f"-c tessedit_char_whitelist={whitelist}")
+        if dpi:
+            args.append(f"--dpi {dpi}")
+        if extra_config:
+            args.append(extra_config)
+        return self._pytesseract.image_to_string(image, lang=self.language, config=" ".join(args))
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """Keeps one Tesseract API handle alive and feeds it images in-process."""
+
+    name = "tesserocr"
+
+    def __init__(self, language=OCR_LANGUAGE, psm=OCR_PAGE_SEG_MODE, whitelist=OCR_CHAR_WHITELIST):
+        import tesserocr
+        kwargs = {"lang": language, "psm": psm}
+        if OCR_TESSDATA_PATH:
+            kwargs["path"] = OCR_TESSDATA_PATH
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        self.language = language
+        self.psm = psm
+        self.whitelist = whitelist or ""
+        self._api.SetVariable("tessedit_char_whitelist", self.whitelist)
+
+    def image_to_string(self, image, psm=None, whitelist=None, dpi=None, extra_config=""):
+        """OCR a PIL image; psm/whitelist override the backend defaults for this call."""
+        # extra_config is a tesseract command-line string and has no in-process equivalent
+        if psm is not None and psm != self.psm:
+            self._api.SetPageSegMode(psm)
+        if whitelist is not None and whitelist != self.whitelist:
+            self._api.SetVariable("tessedit_char_whitelist", whitelist)
+        try:
+            self._api.SetImage(image)
+            if dpi:
+                self._api.SetSourceResolution(dpi)
+            return self._api.GetUTF8Text()
+        finally:
+            if psm is not None and psm != self.psm:
+                self._api.SetPageSegMode(self.psm)
+            if whitelist is not None and whitelist != self.whitelist:
+                self._api.SetVariable("tessedit_char_whitelist", self.whitelist)
+
+    def close(self):
+        self._api.End()
+
+
+OCR_BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+_local = threading.local()
+
+
+def resolve_backend_name(name=OCR_BACKEND):
+    """Map 'auto' to tesserocr when it can be imported, otherwise pytesseract."""
+    if name != "auto":
+        return name
+    try:
+        import tesserocr  # noqa: F401
+        return TesserocrBackend.name
+    except ImportError:
+        return PytesseractBackend.name
+
+
+def backend_signature(name=OCR_BACKEND):
+    """Describe the backend settings for the OCR cache key without loading an engine."""
+    return f"{resolve_backend_name(name)}:{OCR_LANGUAGE}:psm{OCR_PAGE_SEG_MODE}:{OCR_CHAR_WHITELIST}"
+
+
+def get_ocr_backend(name=OCR_BACKEND):
+    """Return this thread's backend instance, creating (and loading) it on first use."""
+    name = resolve_backend_name(name)
+    backends = getattr(_local, "backends", None)
+    if backends is None:
+        backends = _local.backends = {}
+    if name not in backends:
+        if name not in OCR_BACKENDS:
+            raise ValueError(f"Unknown OCR backend '{name}'. Choose from: {', '.join(OCR_BACKENDS)} or 'auto'")
+        backends[name] = OCR_BACKENDS[name]()
+    return backends[name]
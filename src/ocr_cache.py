@@ -0,0 +1,144 @@
+# =============================================================================
+# ocr_cache.py
+# -----------------------------------------------------------------------------
+# Content-addressed cache for OCR results.
+# Keys are a SHA-256 of the image bytes plus the Tesseract configuration, so
+# an unchanged frame is only ever handed to Tesseract once. Results are kept
+# in memory for the run and can optionally be persisted to a directory with
+# size-bounded LRU eviction so re-runs over the same frames skip OCR entirely.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Used by ocr_engine.py, which does the actual Tesseract calls.
+#   - Disk entries are plain UTF-8 .txt files named after their key; the file
+#     modification time doubles as the LRU timestamp.
+#   - The disk size is scanned once and then tracked in memory; the directory
+#     is only listed again when that total goes over max_bytes. Entries
+#     written by other sessions are picked up at that rescan.
+# =============================================================================
+
+import hashlib
+import os
+import threading
+
+from schedule_extractor_config import TESSERACT_CONFIG, OCR_CACHE_MAX_BYTES
+
+EVICT_TARGET_RATIO = 0.9  # Evict down to this share of max_bytes so the next puts don't rescan
+
+
+class OcrCache:
+    """
+    Two-level (memory, then optional disk) cache of OCR text keyed by image content.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=OCR_CACHE_MAX_BYTES):
+        self._memory = {}
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._disk_bytes = None  # Total size of the disk entries, scanned on the first put
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_bytes, config=TESSERACT_CONFIG):
+        """Return the cache key for the given image bytes and Tesseract config."""
+        digest = hashlib.sha256()
+        digest.update(config.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss."""
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+
+        if self.cache_dir:
+            path = self._entry_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                os.utime(path, None)  # Touch so LRU eviction sees it as recently used
+                self._memory[key] = text
+                self.hits += 1
+                return text
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"WARNING: Could not read OCR cache entry {path}: {e}")
+
+        self.misses += 1
+        return None
+
+    def put(self, key, text):
+        """Store text under key in memory and, if enabled, on disk."""
+        self._memory[key] = text
+        if not self.cache_dir:
+            return
+
+        path = self._entry_path(key)
+        # Sessions run by extraction_scheduler share the cache directory from several threads
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, size, _ in self._scan())
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            size = os.path.getsize(tmp_path)
+            try:
+                size -= os.path.getsize(path)  # Replacing an existing entry
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"WARNING: Could not write OCR cache entry {path}: {e}")
+            return
+        self._disk_bytes += size
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _scan(self):
+        """(mtime, size, path) of every disk entry."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Delete least recently used disk entries until the cache is back under EVICT_TARGET_RATIO of max_bytes."""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        if total > self.max_bytes:
+            entries.sort()  # Oldest first
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+        self._disk_bytes = total
+
+    def stats(self):
+        """Return a short human readable hit/miss summary."""
+        return f"OCR cache: {self.hits} hits, {self.misses} misses"
+
@@ -0,0 +1,289 @@
+# =============================================================================
+# ocr_engine.py
+# -----------------------------------------------------------------------------
+# OCR execution for captured canvas snapshots.
+# Wraps the pytesseract calls behind the OCR cache and lets a batch of images
+# be fanned out to any concurrent.futures executor, by default a process pool
+# sized from OCR_MAX_WORKERS. Results always come back ordered by day index.
+# OcrPipeline does the same in the background while frames are still being
+# captured, so OCR overlaps the browser navigation instead of following it.
+# ocr_stage() is the generator form of the pipeline for the streaming
+# capture -> OCR -> parse -> calendar chain.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Worker functions are module level so they can be pickled by
+#     ProcessPoolExecutor (Windows uses the "spawn" start method).
+#   - Each worker caps Tesseract's own OpenMP threads via OMP_THREAD_LIMIT so
+#     N workers don't oversubscribe the CPU with N x cores threads.
+#   - The engine itself comes from ocr_backends.get_ocr_backend(), loaded once
+#     per worker.
+# =============================================================================
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from image_preprocessing import load_image_for_ocr, load_regions_for_ocr, preprocessing_signature, ocr_dpi
+from ocr_backends import backend_signature, get_ocr_backend
+from ocr_cache import OcrCache
+from schedule_extractor_config import (
+    TESSERACT_CONFIG, OCR_MAX_WORKERS, OCR_TESSERACT_THREADS, OCR_PIPELINE_QUEUE_SIZE,
+    ENABLE_ROI_OCR, TILE_FIELD_BOXES
+)
+
+
+def _init_ocr_worker(tesseract_threads):
+    """Process pool initializer: limit the threads Tesseract may use and load the engine once."""
+    os.environ["OMP_THREAD_LIMIT"] = str(tesseract_threads)
+    get_ocr_backend()
+
+
+def cache_key(image_bytes, config=TESSERACT_CONFIG):
+    """OCR cache key for image_bytes: covers the backend, Tesseract config and preprocessing settings."""
+    return OcrCache.make_key(image_bytes, f"{backend_signature()}|{config}|{preprocessing_signature()}")
+
+
+def ocr_tile_fields(image_bytes, config=TESSERACT_CONFIG, fields=TILE_FIELD_BOXES):
+    """
+    OCR only the field boxes of a detail tile, each with its own psm and whitelist.
+    Returns the field texts joined in layout order, one line per field, for the parser.
+    """
+    backend = get_ocr_backend()
+    regions = load_regions_for_ocr(image_bytes, fields)
+    lines = []
+    for name, field in fields.items():
+        text = backend.image_to_string(regions[name], psm=field['psm'], whitelist=field['whitelist'],
+                                       dpi=ocr_dpi(), extra_config=config)
+        lines.append(" ".join(text.split()))
+    return "\n".join(lines)
+
+
+def ocr_image_bytes(image_bytes, config=TESSERACT_CONFIG):
+    """Preprocess and OCR encoded image bytes with the configured backend. Runs in the caller or a pool worker."""
+    if ENABLE_ROI_OCR:
+        return ocr_tile_fields(image_bytes, config)
+    image = load_image_for_ocr(image_bytes)
+    return get_ocr_backend().image_to_string(image, dpi=ocr_dpi(), extra_config=config)
+
+
+def resolve_ocr_workers(max_workers=OCR_MAX_WORKERS):
+    """Turn the OCR_MAX_WORKERS setting into a concrete worker count."""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    return max(1, max_workers)
+
+
+def make_ocr_executor(max_workers=OCR_MAX_WORKERS, tesseract_threads=OCR_TESSERACT_THREADS):
+    """
+    Create the process pool used for OCR.
+    Returns None when only one worker is requested, meaning "run in this process".
+    """
+    max_workers = resolve_ocr_workers(max_workers)
+    if max_workers <= 1:
+        return None
+    print(f"Starting OCR process pool with {max_workers} workers ({tesseract_threads} Tesseract thread(s) each)")
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_ocr_worker,
+        initargs=(tesseract_threads,)
+    )
+
+
+def ocr_images(image_paths, executor=None, cache=None, config=TESSERACT_CONFIG):
+    """
+    OCR a batch of images and return {day_index: (img_path, text)} ordered by day index.
+
+    image_paths: iterable of (day_index, img_path) pairs. Missing files are reported and skipped.
+    executor:    any concurrent.futures.Executor; None runs everything in this process.
+    """
+    started = time.perf_counter()
+    results = {}
+    pending = {}
+
+    for index, img_path in sorted(image_paths):
+        if not os.path.exists(img_path):
+            print(f"File not found: {img_path}")
+            continue
+        with open(img_path, "rb") as f:
+            image_bytes = f.read()
+
+        key = None
+        if cache is not None:
+            key = cache_key(image_bytes, config)
+            text = cache.get(key)
+            if text is not None:
+                results[index] = (img_path, text)
+                continue
+
+        if executor is None:
+            text = ocr_image_bytes(image_bytes, config)
+            if cache is not None:
+                cache.put(key, text)
+            results[index] = (img_path, text)
+        else:
+            pending[index] = (img_path, key, executor.submit(ocr_image_bytes, image_bytes, config))
+
+    for index, (img_path, key, future) in pending.items():
+        try:
+            text = future.result()
+        except Exception as e:
+            print(f"OCR failed for {img_path}: {e}")
+            continue
+        if cache is not None:
+            cache.put(key, text)
+        results[index] = (img_path, text)
+
+    print(f"OCR of {len(results)} image(s) took {time.perf_counter() - started:.2f}s")
+    return {index: results[index] for index in sorted(results)}
+
+
+def ocr_stage(frames, executor=None, cache=None, config=TESSERACT_CONFIG, lookahead=OCR_PIPELINE_QUEUE_SIZE,
+              skipped=None):
+    """
+    Streaming OCR stage: consume (index, png_filename, image_bytes) frames and yield
+    (index, png_filename, text) in capture order.
+
+    With an executor, frames are OCR'd in the background while the next ones are
+    captured; results are yielded as soon as the oldest frame is done, and the
+    stage only stops pulling new frames when lookahead of them are in flight.
+    Without one each frame is OCR'd inline before the next is captured.
+    Frames whose OCR fails are dropped and their file names appended to the skipped list.
+    """
+    pending = deque()
+
+    def finish(item):
+        index, png_filename, key, result = item
+        if isinstance(result, Future):
+            try:
+                result = result.result()
+            except Exception as e:
+                print(f"OCR failed for {png_filename}: {e}")
+                if skipped is not None:
+                    skipped.append(png_filename)
+                return None
+            if cache is not None:
+                cache.put(key, result)
+        return index, png_filename, result
+
+    for index, png_filename, image_bytes in frames:
+        key = cache_key(image_bytes, config) if cache is not None else None
+        text = cache.get(key) if cache is not None else None
+        if text is None:
+            if executor is None:
+                text = ocr_image_bytes(image_bytes, config)
+                if cache is not None:
+                    cache.put(key, text)
+            else:
+                text = executor.submit(ocr_image_bytes, image_bytes, config)
+        pending.append((index, png_filename, key, text))
+
+        while pending and (len(pending) > lookahead or not isinstance(pending[0][3], Future) or pending[0][3].done()):
+            result = finish(pending.popleft())
+            if result is not None:
+                yield result
+
+    while pending:
+        result = finish(pending.popleft())
+        if result is not None:
+            yield result
+
+
+class OcrPipeline:
+    """
+    Producer/consumer OCR stage that runs alongside the capture loop.
+
+    The capture loop calls submit() with the in-memory PNG bytes of every frame;
+    submit() only blocks when max_queued frames are already waiting. Consumer
+    threads pull frames off the bounded queue, OCR them (on executor when given)
+    and optionally parse them with parser(png_filename, text). close() waits for
+    the backlog to drain and returns {day_index: (png_filename, text, entry)}
+    ordered by day index. Frames whose OCR fails are appended to the skipped list.
+    """
+
+    _STOP = object()
+
+    def __init__(self, executor=None, cache=None, config=TESSERACT_CONFIG, parser=None,
+                 workers=None, max_queued=OCR_PIPELINE_QUEUE_SIZE, skipped=None):
+        self.executor = executor
+        self.cache = cache
+        self.config = config
+        self.parser = parser
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._results = {}
+        self.skipped = skipped if skipped is not None else []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+        if workers is None:
+            workers = resolve_ocr_workers() if executor is not None else 1
+        self._threads = [
+            threading.Thread(target=self._consume, name=f"ocr-consumer-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, index, png_filename, image_bytes):
+        """Queue a captured frame for OCR. Blocks while the queue is full."""
+        self._queue.put((index, png_filename, image_bytes))
+
+    def _ocr(self, image_bytes):
+        key = None
+        if self.cache is not None:
+            key = cache_key(image_bytes, self.config)
+            with self._lock:
+                text = self.cache.get(key)
+            if text is not None:
+                return text
+
+        if self.executor is None:
+            text = ocr_image_bytes(image_bytes, self.config)
+        else:
+            text = self.executor.submit(ocr_image_bytes, image_bytes, self.config).result()
+
+        if self.cache is not None:
+            with self._lock:
+                self.cache.put(key, text)
+        return text
+
+    def _consume(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                index, png_filename, image_bytes = item
+                try:
+                    text = self._ocr(image_bytes)
+                    entry = None
+                    if self.parser is not None:
+                        entry = self.parser(png_filename, text.strip().replace('\n', ' '))
+                except Exception as e:
+                    print(f"OCR failed for {png_filename}: {e}")
+                    with self._lock:
+                        self.skipped.append(png_filename)
+                    continue
+                with self._lock:
+                    self._results[index] = (png_filename, text, entry)
+                print(f"OCR finished for frame {index} ({self._queue.qsize()} frame(s) still queued)")
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """Wait for all queued frames to be processed and return the ordered results."""
+        waited_from = time.perf_counter()
+        for _ in self._threads:
+            self._queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+        print(f"OCR pipeline drained {time.perf_counter() - waited_from:.2f}s after the last frame "
+              f"({len(self._results)} frame(s), {time.perf_counter() - self._started:.2f}s total)")
+        return {index: self._results[index] for index in sorted(self._results)}
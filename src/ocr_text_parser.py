@@ -0,0 +1,178 @@
+# =============================================================================
+# ocr_text_parser.py
+# -----------------------------------------------------------------------------
+# Turns the OCR text of one schedule detail view into a structured entry
+# (username, store, weekday, month, date, shift/meal times, department),
+# either as a dict of strings or as a ShiftRecord.
+# All fields come out of a single scan with one precompiled tokenizer, and
+# time strings are converted through a lookup table of every minute of the
+# day instead of datetime.strptime.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Each field takes the first token of its kind, like the separate
+#     re.search calls this replaces. Tokens don't overlap, so the few fields
+#     that can start inside another token (HIDDEN_FIELDS) are looked up there.
+#   - Shared by schedule_extractor_utils.py and parse_ocr_csv.py; parse_stage()
+#     is the generator stage used by the streaming pipeline.
+#   - benchmark_ocr_parser.py compares it with the previous implementation.
+# =============================================================================
+
+import csv
+import re
+
+from shift_record import ShiftRecord, WEEKDAYS, MONTHS, MONTH_NUMBERS, time_to_minutes
+
+# Alternatives are tried in this order at every position: time and department come
+# before date so "7:00 PM" or "040 - ..." isn't split into a bare number, and username
+# before weekday/month so "Mon A" is still a name (its weekday is recovered below).
+# The store number only consumes its '#', so glued OCR like "#12347:00 PM" still
+# yields the time "47:00 PM" exactly as a separate findall would.
+TOKEN_PATTERN = re.compile(
+    r'(?P<time>(?i:\d{1,2}:\d{2}\s*[AP]M))'
+    r'|(?P<department>0\d{2}\s*-\s*[A-Za-z &]+)'
+    r'|(?P<store_number>#(?=(?P<store_digits>\d{4})))'
+    r'|\b(?P<username>(?P<first_name>[A-Z][a-zA-Z]*) (?P<initial>[A-Z]))\b'
+    r'|\b(?P<weekday>' + '|'.join(WEEKDAYS) + r')\b'
+    r'|\b(?P<month>' + '|'.join(MONTHS) + r')\b'
+    r'|\b(?P<date>[12][0-9]|3[01]|[1-9])\b'
+)
+DATE_PATTERN = re.compile(r'\b([12][0-9]|3[01]|[1-9])\b')
+USERNAME_PATTERN = re.compile(r'\b([A-Z][a-zA-Z]*) ([A-Z])\b')
+WEEKDAY_PATTERN = re.compile(r'\b(' + '|'.join(WEEKDAYS) + r')\b')
+MONTH_PATTERN = re.compile(r'\b(' + '|'.join(MONTHS) + r')\b')
+
+# Fields that can start inside a token of another kind: the hour of "7:00 PM" reads
+# as a date and "PM D" as a name, and a department name can contain a name or month.
+HIDDEN_FIELDS = {
+    'time': (('date', DATE_PATTERN), ('username', USERNAME_PATTERN)),
+    'department': (('username', USERNAME_PATTERN), ('weekday', WEEKDAY_PATTERN), ('month', MONTH_PATTERN)),
+}
+
+def extract_username(text):
+    # Find first occurrence of a name followed by a single uppercase letter
+    match = USERNAME_PATTERN.search(text)
+    if match:
+        return f"{match.group(1)} {match.group(2)}"
+    return ''
+
+
+def find_meal_end(times, meal_start):
+    """The first time after the meal start that is 30 or 60 minutes later, else ''."""
+    meal_start_minutes = time_to_minutes(meal_start)
+    if meal_start_minutes is not None:
+        for time_str in times[2:]:
+            minutes = time_to_minutes(time_str)
+            if minutes is None:
+                break
+            if minutes - meal_start_minutes in (30, 60):
+                return time_str
+        else:
+            return ''
+    # Unreadable time: fall back to the third time on the card
+    return times[2] if len(times) > 2 else ''
+
+
+def tokenize_fields(text):
+    """One tokenizer pass over text. Returns (fields, times): the first token of every field and all times."""
+    fields = {}
+    times = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'time':
+            times.append(match.group())
+        elif kind == 'username':
+            first_name = match.group('first_name')
+            fields.setdefault('username', f"{first_name} {match.group('initial')}")
+            if first_name in WEEKDAYS:
+                fields.setdefault('weekday', first_name)
+            elif first_name in MONTHS:
+                fields.setdefault('month', first_name)
+        elif kind == 'store_number':
+            fields.setdefault(kind, '#' + match.group('store_digits'))
+        elif kind not in fields:
+            fields[kind] = match.group()
+
+        for field, pattern in HIDDEN_FIELDS.get(kind, ()):
+            if field not in fields:
+                hidden = pattern.search(text, match.start())
+                if hidden and hidden.start() < match.end():
+                    fields[field] = hidden.group()
+    return fields, times
+
+
+def parse_card_date(text):
+    """(month, day) printed on a detail view, scheduled or not, or None if it can't be read."""
+    fields, _ = tokenize_fields(text)
+    month = MONTH_NUMBERS.get(fields.get('month', '').lower())
+    day = int(fields['date']) if 'date' in fields else None
+    return (month, day) if month and day else None
+
+
+def parse_ocr_text(png_filename, text):
+    """
+    Parse the OCR text of one detail view into a structured entry.
+    Returns None for days that are not assigned or not scheduled.
+    """
+    lowered = text.lower()
+    if "not assigned" in lowered or "not scheduled" in lowered:
+        return None
+
+    fields, times = tokenize_fields(text)
+    shift_start = times[0] if len(times) > 0 else ''
+    meal_start = times[1] if len(times) > 1 else ''
+    meal_end = find_meal_end(times, meal_start) if meal_start else ''
+    shift_end = times[-1] if times else ''
+
+    return {
+        'png_filename': png_filename,
+        'username': fields.get('username', ''),
+        'store_number': fields.get('store_number', ''),
+        'weekday': fields.get('weekday', ''),
+        'month': fields.get('month', ''),
+        'date': fields.get('date', ''),
+        'shift_start': shift_start,
+        'meal_start': meal_start,
+        'meal_end': meal_end,
+        'shift_end': shift_end,
+        'department': fields.get('department', '').strip()
+    }
+
+
+def parse_shift_record(png_filename, text, year=None):
+    """Parse the OCR text of one detail view into a ShiftRecord, or None for unscheduled days."""
+    entry = parse_ocr_text(png_filename, text)
+    if entry is None:
+        return None
+    return ShiftRecord.from_row(entry, year)
+
+
+def parse_stage(ocr_results, year=None, scanned_days=None):
+    """
+    Streaming parse stage: consume (index, png_filename, text) OCR results and
+    yield a ShiftRecord for every scheduled day. The card date of every result,
+    scheduled or not, is appended to the scanned_days list (see shift_record.scan_window).
+    """
+    for _, png_filename, text in ocr_results:
+        text = text.strip().replace('\n', ' ')
+        if scanned_days is not None:
+            scanned_days.append(parse_card_date(text))
+        record = parse_shift_record(png_filename, text, year)
+        if record is not None:
+            yield record
+
+
+def parse_ocr_csv(csv_path):
+    """Parse every row of an OCR results CSV (filename, ocr_text) into structured entries."""
+    results = []
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            entry = parse_ocr_text(row['filename'], row['ocr_text'])
+            if entry is not None:
+                results.append(entry)
+    return results
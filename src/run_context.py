@@ -0,0 +1,120 @@
+# =============================================================================
+# run_context.py
+# -----------------------------------------------------------------------------
+# Paths used by one extraction run. Every run works in its own workspace
+# (SCREENSHOT_OUTPUT_DIR/runs/<run id>) and only copies its finished result
+# files to SCREENSHOT_OUTPUT_DIR at the end, each with an atomic rename, so
+# runs on the same host never delete or half-overwrite each other's files.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - Passed to snapshot_schedule_entries, the OCR taps and calendar_builder.main.
+#   - Published files are always complete; a reader sees either the previous
+#     run's file or this run's, never a mix.
+#   - Without REUSE_BROWSER_PROFILE the run also gets a fresh Chrome profile
+#     inside its workspace. A reused profile can only be open in one browser at
+#     a time; concurrent runs need separate profile_dirs (see extraction_scheduler.py).
+#   - The defaults share CHROME_USER_DATA_DIR, token.json and calendar_state.json
+#     with every other run. Concurrent runs must pass their own profile_dir,
+#     token_file and state_file, or set REUSE_BROWSER_PROFILE = False.
+# =============================================================================
+
+import datetime
+import os
+import secrets
+import shutil
+import time
+
+from schedule_extractor_config import (
+    SCREENSHOT_OUTPUT_DIR, CHROME_USER_DATA_DIR, REUSE_BROWSER_PROFILE, SAVE_SNAPSHOTS_TO_DISK,
+    RUN_WORKSPACE_MAX_AGE_HOURS
+)
+
+RUNS_DIRNAME = 'runs'
+
+
+def new_run_id():
+    """Sortable, unique run id: start time, process id and a random suffix."""
+    return f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{secrets.token_hex(3)}"
+
+
+def remove_stale_workspaces(output_dir=SCREENSHOT_OUTPUT_DIR, max_age_hours=RUN_WORKSPACE_MAX_AGE_HOURS):
+    """Remove run workspaces older than max_age_hours, left behind by crashed runs. Active runs are younger."""
+    runs_dir = os.path.join(output_dir, RUNS_DIRNAME)
+    if not os.path.isdir(runs_dir):
+        return
+    cutoff = time.time() - max_age_hours * 3600
+    for name in os.listdir(runs_dir):
+        path = os.path.join(runs_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path)
+                print(f"Removed stale run workspace: {path}")
+        except OSError as e:
+            print(f"WARNING: Could not remove stale run workspace {path}: {e}")
+
+
+class RunContext:
+    """
+    Workspace, output, Chrome profile, token and calendar state paths of one run.
+    Use as a context manager, or call create() and close().
+    """
+
+    def __init__(self, output_dir=SCREENSHOT_OUTPUT_DIR, profile_dir=None, token_file=None, state_file=None,
+                 run_id=None, reuse_profile=REUSE_BROWSER_PROFILE, keep_workspace=SAVE_SNAPSHOTS_TO_DISK):
+        self.run_id = run_id or new_run_id()
+        self.output_dir = output_dir  # Finished files are published here
+        self.workspace = os.path.join(output_dir, RUNS_DIRNAME, self.run_id)
+        self._owns_profile = profile_dir is None and not reuse_profile
+        if profile_dir is None:
+            profile_dir = CHROME_USER_DATA_DIR if reuse_profile else os.path.join(self.workspace, 'chrome_profile')
+        self.profile_dir = profile_dir
+        self.token_file = token_file  # None = calendar_builder.TOKEN_FILE
+        self.state_file = state_file  # None = calendar_state_cache.CALENDAR_STATE_FILE
+        self.keep_workspace = keep_workspace  # Keep snapshots and result files for debugging
+        self.skipped_frames = []  # Frames dropped by dedup_frames or failed OCR: days that were not scanned
+        self.scanned_days = []    # (month, day) or None of every captured card, in capture order
+
+    def create(self):
+        os.makedirs(self.workspace, exist_ok=True)
+        print(f"Run {self.run_id}: workspace {self.workspace}")
+        return self
+
+    def path(self, filename):
+        """Path of a file in this run's workspace."""
+        return os.path.join(self.workspace, filename)
+
+    def output_path(self, filename):
+        """Path a workspace file is published to."""
+        return os.path.join(self.output_dir, filename)
+
+    def publish(self, *filenames):
+        """Copy finished workspace files to output_dir, replacing each one atomically."""
+        published = []
+        for filename in filenames:
+            target = self.output_path(filename)
+            tmp_path = f"{target}.{self.run_id}.tmp"
+            shutil.copyfile(self.path(filename), tmp_path)
+            os.replace(tmp_path, target)
+            published.append(target)
+        print(f"Run {self.run_id}: published {', '.join(published)}")
+        return published
+
+    def close(self):
+        """Remove the per-run Chrome profile, and the workspace unless keep_workspace is set."""
+        if self._owns_profile:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        if self.keep_workspace:
+            print(f"Run {self.run_id}: keeping workspace {self.workspace}")
+            return
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
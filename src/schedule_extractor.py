@@ -21,79 +21,94 @@
 
 import os
 import time
-import shutil
 import random
-import pytesseract
 import datetime
 import csv
 import sys # Added for command-line argument handling
 import tkinter as tk # Added for GUI dialog
 from tkinter import simpledialog # Added for GUI dialog
-from PIL import Image
 
 # utils imports
 from schedule_extractor_utils import (
-    is_chrome_running,          # NEW: For checking if Chrome is running
-    kill_chrome_processes,      # NEW: For terminating Chrome processes
+    kill_chrome_processes,      # Opt-in (KILL_EXISTING_CHROME): terminates every Chrome process
     initialize_undetected_chrome_driver,
     perform_login,
     perform_minimization_sequence,
     drag_element_to_scroll,
     capture_and_ocr_segment,
     perform_mouse_click_on_element,
-    parse_ocr_csv, COLUMN_NAMES
+    wait_for_canvas_stable,
+    COLUMN_NAMES
 )
 
+# OCR imports
+from ocr_cache import OcrCache
+from ocr_engine import make_ocr_executor, OcrPipeline, ocr_stage
+from ocr_text_parser import parse_stage, parse_shift_record, parse_card_date
+from shift_record import scan_years
+from frame_dedup import dedup_frames
+from canvas_capture import capture_frame, capture_full_canvas, frame_filename
+from canvas_input import get_canvas_input
+from run_context import RunContext, remove_stale_workspaces
+from browser_process import BrowserProcessTree, quit_browser
+
 # config imports
 from schedule_extractor_config import (
     WEB_APP_URL, WEB_APP_LOGIN_URL, SCREENSHOT_OUTPUT_DIR, CHROME_USER_DATA_DIR, CHROMEDRIVER_PATH,
     SCHEDULE_CLICK_X_OFFSET, SCHEDULE_CLICK_Y_OFFSET, FLUTTER_VIEW_LOCATOR,
-    OCR_FILEPATH, OCR_RESULTS_FILEPATH, OCR_CSV_FILEPATH,
+    OCR_OUTPUT_FILENAME, OCR_RESULTS_FILENAME, OCR_CSV_FILENAME,
     MAX_DRAG_ATTEMPTS, DRAG_AMOUNT_Y_PIXELS, DRAG_START_X_OFFSET,
     DRAG_START_Y_OFFSET_RELATIVE_TO_ELEMENT_HEIGHT,
     END_OF_SCROLL_INDICATOR_LOCATOR,
-    SCROLL_FLUTTER_VIEW_AND_CAPTURE
+    SCROLL_FLUTTER_VIEW_AND_CAPTURE,
+    ENABLE_OCR_DISK_CACHE, OCR_CACHE_DIR,
+    SAVE_SNAPSHOTS_TO_DISK,
+    LOGIN_TIMEOUT_SECONDS, LOGIN_POLL_INTERVAL,
+    REUSE_BROWSER_PROFILE, SESSION_PROBE_TIMEOUT, HEADLESS_WINDOW_SIZE, KILL_EXISTING_CHROME, INPUT_BACKEND,
+    ENABLE_STREAMING_PIPELINE, STREAM_WRITE_CSV_TAPS, STREAM_CONFIRM_WRITES
 )
 
 # calendar_builder imports
 # Assuming calendar_builder.main will be updated to accept calendar_id and structured_csv_path
 from calendar_builder import main as create_calendar_events
+from calendar_builder import (
+    get_credentials, get_or_create_calendar, valid_shifts, shift_event_bodies, stream_sync_events,
+    CALENDAR_TIMEZONE
+)
+from calendar_batch import make_http_factory
+from calendar_state_cache import CalendarStateCache, CALENDAR_STATE_FILE
+from calendar_writer import CalendarWriter
+from googleapiclient.discovery import build
 
 # selenium imports
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
 
-def cleanup_environment():
-    """Remove old Chrome user data and screenshots for a fresh run."""
-    print(f"Cleaning up old Chrome user data directory: {CHROME_USER_DATA_DIR}")
-
-    if os.path.exists(CHROME_USER_DATA_DIR):
-        try:
-            shutil.rmtree(CHROME_USER_DATA_DIR)
-            print("Old user data directory removed.")
-        except Exception as e:
-            print(f"WARNING: Could not remove user data directory: {e}")
-
-    print(f"Cleaning up old screenshots in: {SCREENSHOT_OUTPUT_DIR}")
-    if os.path.exists(SCREENSHOT_OUTPUT_DIR):
-        try:
-            shutil.rmtree(SCREENSHOT_OUTPUT_DIR)
-            print("Old screenshot directory removed.")
-        except Exception as e:
-            print(f"WARNING: Could not remove screenshot directory: {e}")
-    os.makedirs(SCREENSHOT_OUTPUT_DIR, exist_ok=True)
-    print(f"Ensured screenshot output directory exists: {SCREENSHOT_OUTPUT_DIR}")
+def cleanup_environment(context):
+    """
+    Create this run's workspace and remove workspaces left behind by crashed runs.
+    Files of other runs that are still in progress are left alone.
+    """
+    remove_stale_workspaces(context.output_dir)
+    context.create()
+    if context.profile_dir == CHROME_USER_DATA_DIR:
+        print(f"Keeping Chrome user data directory for session reuse: {CHROME_USER_DATA_DIR}")
+    else:
+        print(f"Using Chrome user data directory: {context.profile_dir}")
 
 
-def launch_browser(headless=False):
-    """Launch Chrome with required options."""
+def launch_browser(headless=False, user_data_dir=CHROME_USER_DATA_DIR):
+    """Launch Chrome with required options, using user_data_dir as the browser profile."""
     chrome_options = Options()
     if headless:
         chrome_options.add_argument("--headless=new")
+        # There is no screen to maximize to; use the window size the click coordinates were calibrated on
+        chrome_options.add_argument(f"--window-size={HEADLESS_WINDOW_SIZE[0]},{HEADLESS_WINDOW_SIZE[1]}")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--start-maximized")
@@ -121,77 +136,86 @@ def launch_browser(headless=False):
     chrome_options.add_argument("--disable-setuid-sandbox")
     chrome_options.add_argument("--disable-notifications")
     service = Service(CHROMEDRIVER_PATH)
-    driver = initialize_undetected_chrome_driver(options=chrome_options)
+    driver = initialize_undetected_chrome_driver(options=chrome_options, user_data_dir=user_data_dir)
+    # Remember the processes this driver started so quit_browser() stops exactly those
+    driver.process_tree = BrowserProcessTree.from_driver(driver)
     return driver
 
 
-def handle_thd_login (driver):
-    # Define the current URL
-    current_url = driver.current_url
-    prev_url = WEB_APP_LOGIN_URL
-    sleep_time = 30
-
-    current_url = driver.current_url.split("?")[0]
-    print(current_url)
-
-    print("current URL:", current_url)
-
-    while current_url == prev_url:
-        # Wait for the URL to change
-        print("waiting for change in current URL:", current_url)
-        current_url = driver.current_url.split("?")[0]
-        time.sleep(sleep_time)
+def _current_base_url(driver):
+    """Current URL without the query string."""
+    return driver.current_url.split("?")[0]
 
-    # Print the new URL
-    current_url = driver.current_url.split("?")[0]
-    prev_url = driver.current_url.split("?")[0]
-    print("NEW current URL:", current_url)
 
-    while current_url == prev_url:
-        # Wait for the URL to change
-        current_url = driver.current_url.split("?")[0]
-        print("waiting for next change in current URL:", current_url)
-        time.sleep(sleep_time)
+# Login handoff state machine: (phase name, description, condition that ends the phase).
+# Each phase is polled with a short-interval WebDriverWait, so the script moves on
+# within LOGIN_POLL_INTERVAL of the browser reaching the next state.
+LOGIN_PHASES = [
+    ("credentials", "waiting for the user to submit the login form",
+     lambda d: _current_base_url(d) != WEB_APP_LOGIN_URL),
+    ("verification", "waiting for CAPTCHA/verification to redirect back to the web app",
+     lambda d: _current_base_url(d).startswith(WEB_APP_URL)),
+    ("dashboard", "waiting for the Flutter dashboard to render",
+     EC.visibility_of_element_located(FLUTTER_VIEW_LOCATOR)),
+]
 
-    # Print the new URL
-    current_url = driver.current_url.split("?")[0]
-    prev_url = driver.current_url.split("?")[0]
-    print("New current URL:", driver.current_url)
 
-    # all of this is awful, but it works
-    #while current_url == prev_url:
-    while current_url != "https://wft.homedepot.com/": 
-
-        # Wait for the URL to change
-        current_url = driver.current_url.split("?")[0]
-        print("waiting for next change in current URL:", current_url)
-        time.sleep(sleep_time)
+def has_valid_session(driver, timeout=SESSION_PROBE_TIMEOUT):
+    """
+    Check whether the reused profile is still logged in.
+    A valid WFT session goes straight to the web app and renders flutter-view within a few seconds;
+    an expired one is redirected to the login page.
+    """
+    started = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=LOGIN_POLL_INTERVAL).until(
+            lambda d: _current_base_url(d).startswith(WEB_APP_URL)
+            and EC.visibility_of_element_located(FLUTTER_VIEW_LOCATOR)(d)
+        )
+    except TimeoutException:
+        print(f"No valid session found after {time.perf_counter() - started:.1f}s (URL: {_current_base_url(driver)})")
+        return False
+    print(f"Reusing existing session: dashboard ready in {time.perf_counter() - started:.1f}s")
+    return True
 
-    # Print the new URL
-    current_url = driver.current_url.split("?")[0]
-    prev_url = driver.current_url.split("?")[0]
-    print("New current URL:", driver.current_url)
 
+def handle_thd_login (driver, timeout=LOGIN_TIMEOUT_SECONDS, poll_interval=LOGIN_POLL_INTERVAL):
+    """
+    Hand the browser to the user for login/CAPTCHA and resume as soon as the dashboard is up.
+    Returns {phase: seconds} for each login phase. Exits if the whole handoff exceeds timeout.
+    """
+    print("current URL:", _current_base_url(driver))
+    started = time.perf_counter()
+    phase_times = {}
+
+    for phase, description, condition in LOGIN_PHASES:
+        phase_started = time.perf_counter()
+        remaining = timeout - (phase_started - started)
+        print(f"Login phase '{phase}': {description}...")
+        try:
+            WebDriverWait(driver, max(remaining, 0), poll_frequency=poll_interval).until(condition)
+        except TimeoutException:
+            print(f"Timeout in login phase '{phase}' after {timeout}s. Please check the browser window.")
+            quit_browser(driver)
+            exit(1)
+        phase_times[phase] = time.perf_counter() - phase_started
+        print(f"Login phase '{phase}' done in {phase_times[phase]:.1f}s (URL: {_current_base_url(driver)})")
 
-    try:
-        #WebDriverWait(driver, 10).until( # Original commented line, keeping it as is
-        WebDriverWait(driver, 600).until(
-            EC.visibility_of_element_located(FLUTTER_VIEW_LOCATOR)
-        )
-        print("Login and CAPTCHA complete. Proceeding with automation.")
-    except Exception as e:
-        print("Timeout waiting for dashboard after login. Please check the browser window.")
-        driver.quit()
-        exit(1)
+    print(f"Login and CAPTCHA complete in {time.perf_counter() - started:.1f}s. Proceeding with automation.")
+    return phase_times
 
 
-def take_a_snapshot(driver, flutter_view_element, step_name="step"):
+def take_a_snapshot(driver, flutter_view_element, step_name="step", output_dir=SCREENSHOT_OUTPUT_DIR):
     """
     Take a snapshot of the current view, save it, and exit the script.
     The user can then open the image in Paint to determine the next click coordinates.
+    Only written when SAVE_SNAPSHOTS_TO_DISK is enabled.
     """
-    snapshot_path = os.path.join(SCREENSHOT_OUTPUT_DIR, f"{step_name}_snapshot.png")
-    flutter_view_element.screenshot(snapshot_path)
+    if not SAVE_SNAPSHOTS_TO_DISK:
+        return
+    snapshot_path = os.path.join(output_dir, f"{step_name}_snapshot.png")
+    with open(snapshot_path, "wb") as f:
+        f.write(capture_full_canvas(flutter_view_element, driver))
     print(f"\nSnapshot saved: {snapshot_path}")
     #print("Open this image in Paint or another tool to determine the next click coordinates.") # Original commented line, keeping it as is
     #print("Exit the script now, update your code/config with the new coordinates, and rerun when ready.") # Original commented line, keeping it as is
@@ -202,7 +226,12 @@ def take_a_snapshot(driver, flutter_view_element, step_name="step"):
 def click_canvas_at(driver, canvas_element, x, y):
     """
     Dispatch a pointerdown and pointerup event at (x, y) relative to the top-left of the canvas element.
+    With INPUT_BACKEND 'cdp' this is a DevTools mouse press/release (canvas_input.py).
     """
+    if INPUT_BACKEND == 'cdp':
+        get_canvas_input(driver).click(canvas_element, x, y)
+        print(f"Canvas click dispatched at ({x}, {y}) relative to canvas.")
+        return
     driver.execute_script("""
         const canvas = arguments[0];
         const rect = canvas.getBoundingClientRect();
@@ -231,11 +260,22 @@ def scroll_canvas_with_wheel(driver, canvas_element, delta_y, steps=1, delay=0.2
     Simulate mouse wheel scrolling on the canvas at a specific (x, y) coordinate.
     delta_y: positive for scroll down, negative for scroll up.
     steps: number of wheel events to send.
-    delay: seconds to wait between events.
+    delay: seconds to wait between events (0 when the caller waits with wait_for_canvas_stable).
     x, y: coordinates relative to the top-left of the canvas.
+    With INPUT_BACKEND 'cdp' the events are DevTools wheel events, and without a delay
+    all steps are sent as one gesture.
     """
+    if INPUT_BACKEND == 'cdp' and not delay:
+        get_canvas_input(driver).wheel(canvas_element, x, y, delta_y, steps=steps)
+        print(f"Dispatched {steps} wheel event(s) with deltaY={delta_y} at ({x}, {y})")
+        return
     for i in range(steps):
         print(f"top of wheel event loop #{i+1} with deltaY={delta_y} at ({x}, {y})")
+        if INPUT_BACKEND == 'cdp':
+            get_canvas_input(driver).wheel(canvas_element, x, y, delta_y)
+            print(f"Dispatched wheel event #{i+1} with deltaY={delta_y} at ({x}, {y})")
+            time.sleep(delay)
+            continue
         driver.execute_script("""
             const canvas = arguments[0];
             const rect = canvas.getBoundingClientRect();
@@ -248,56 +288,70 @@ def scroll_canvas_with_wheel(driver, canvas_element, delta_y, steps=1, delay=0.2
             canvas.dispatchEvent(wheelEvent);
         """, canvas_element, delta_y, x, y)
         print(f"Dispatched wheel event #{i+1} with deltaY={delta_y} at ({x}, {y})")
-        time.sleep(delay)
+        if delay:
+            time.sleep(delay)
 
 
-def save_canvas_snapshot(canvas_element, step_name):
+def save_canvas_snapshot(canvas_element, step_name, save_to_disk=SAVE_SNAPSHOTS_TO_DISK, output_dir=SCREENSHOT_OUTPUT_DIR):
     """
-    Save a screenshot of the canvas element for OCR processing.
+    Capture the canvas element as in-memory image bytes for OCR processing, with the
+    configured CAPTURE_BACKEND (PNG or WebP, possibly clipped to the schedule content).
+    The image is also written to output_dir when save_to_disk is set (debug sink).
     """
-    snapshot_path = os.path.join(SCREENSHOT_OUTPUT_DIR, f"{step_name}_canvas.png")
-    canvas_element.screenshot(snapshot_path)
-    print(f"Canvas snapshot saved: {snapshot_path}")
-    return snapshot_path
+    png_bytes = capture_frame(canvas_element)
+    if save_to_disk:
+        snapshot_path = os.path.join(output_dir, frame_filename(step_name))
+        with open(snapshot_path, "wb") as f:
+            f.write(png_bytes)
+        print(f"Canvas snapshot saved: {snapshot_path}")
+    return png_bytes
 
 
-def snapshot_schedule_entries (driver):
-
-    # scroll through the schedule canvas and snapshot them
-
+def open_schedule_list(driver, output_dir=SCREENSHOT_OUTPUT_DIR):
+    """
+    Navigate from the dashboard to the top of the day-by-day schedule list and return the canvas.
+    Debug snapshots go to output_dir.
+    """
     flutter_view_element = WebDriverWait(driver, 30).until(
         EC.visibility_of_element_located(FLUTTER_VIEW_LOCATOR)
     )
     #time.sleep(20) # Original commented line, keeping it as is
     #print("Waiting 5 seconds before clicking through navigation steps...") # Original commented line, keeping it as is
-    take_a_snapshot(driver, flutter_view_element, step_name="dashboard")
+    take_a_snapshot(driver, flutter_view_element, step_name="dashboard", output_dir=output_dir)
     #time.sleep(10) # Original commented line, keeping it as is
 
     # Click the schedule tile
     click_canvas_at(driver, flutter_view_element, 300, 300)
-    time.sleep(2)
-    take_a_snapshot(driver, flutter_view_element, step_name="schedule_tile")
+    wait_for_canvas_stable(driver, flutter_view_element, timeout=2)
+    take_a_snapshot(driver, flutter_view_element, step_name="schedule_tile", output_dir=output_dir)
 
     # Minimize first graphic
     #click_canvas_at(driver, flutter_view_element, 1200, 645) # Original commented line, keeping it as is
     click_canvas_at(driver, flutter_view_element, 1200, 550)
-    time.sleep(2)
-    take_a_snapshot(driver, flutter_view_element, step_name="minimize_one")
+    wait_for_canvas_stable(driver, flutter_view_element, timeout=2)
+    take_a_snapshot(driver, flutter_view_element, step_name="minimize_one", output_dir=output_dir)
 
     # Minimize second graphic
     click_canvas_at(driver, flutter_view_element, 1200, 300)
-    time.sleep(2)
-    take_a_snapshot(driver, flutter_view_element, step_name="minimize_two")
-    time.sleep(2)
+    wait_for_canvas_stable(driver, flutter_view_element, timeout=2)
+    take_a_snapshot(driver, flutter_view_element, step_name="minimize_two", output_dir=output_dir)
+    wait_for_canvas_stable(driver, flutter_view_element, timeout=2)
 
     # Scroll and snapshot pipeline
     print("Scrolling up to the top of the day of the month view...")
     scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=-120, steps=10, delay=0.2, x=1200, y=350)
-    take_a_snapshot(driver, flutter_view_element, step_name="after_scroll_up")
-    time.sleep(2)
+    take_a_snapshot(driver, flutter_view_element, step_name="after_scroll_up", output_dir=output_dir)
+    wait_for_canvas_stable(driver, flutter_view_element, timeout=2)
+    return flutter_view_element
+
 
+def capture_detail_views(driver, flutter_view_element, num_scrolls=21, output_dir=SCREENSHOT_OUTPUT_DIR):
+    """
+    Walk the schedule list (21 day entries by default) and yield
+    (day_index, png_filename, png_bytes) for every detail view as soon as it is captured.
+    Debug snapshots go to output_dir.
+    """
     print("Beginning snapshot and scroll loop...")
-    num_scrolls = 21   # Capture 21 day entries
 
     for i in range(num_scrolls):
         print(f"iter {i} for the scroll loop...")
@@ -308,7 +362,7 @@ def snapshot_schedule_entries (driver):
 
             print(f"i is mod 7: 0...")
             snap_name = f"weekly_summary_{i}"
-            save_canvas_snapshot(flutter_view_element, snap_name)
+            save_canvas_snapshot(flutter_view_element, snap_name, output_dir=output_dir)
 
             absy = 195
 
@@ -324,22 +378,23 @@ def snapshot_schedule_entries (driver):
 
             #scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=95, steps=1, delay=1, x=1200, y=350) # Original commented line, keeping it as is
             #scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=95, steps=1, delay=1, x=1200, y=190) # Original commented line, keeping it as is
-            scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=wsdelta, steps=1, delay=1, x=1200, y=absy)
+            scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=wsdelta, steps=1, delay=0, x=1200, y=absy)
+            wait_for_canvas_stable(driver, flutter_view_element, timeout=1)
             snap_name = f"after_summary_{i}"
-            save_canvas_snapshot(flutter_view_element, snap_name)
+            save_canvas_snapshot(flutter_view_element, snap_name, output_dir=output_dir)
             print(f"Snapshot taken for detail view {i}")
-            time.sleep(1)
 
         # 1. Click the button at (x=1200, y=270) before scrolling down
         #print(f"Clicking button at (1200, 270) before scroll {i+1}...") # Original commented line, keeping it as is
         print(f"Clicking button at (1200, {absy}) before scroll {i+1}...")
         click_canvas_at(driver, flutter_view_element, 1200, absy)
-        time.sleep(1)
+        wait_for_canvas_stable(driver, flutter_view_element, timeout=1)
 
         # 2. Take a snapshot of the new view after the click
         snap_name = f"detail_view_{i+1}"
-        save_canvas_snapshot(flutter_view_element, snap_name)
+        png_bytes = save_canvas_snapshot(flutter_view_element, snap_name, output_dir=output_dir)
         print(f"Snapshot taken for detail view {i+1}")
+        yield i + 1, frame_filename(snap_name), png_bytes
 
         # 3. Return to the DOM canvas using browser back
         print("Returning to DOM canvas...")
@@ -348,9 +403,9 @@ def snapshot_schedule_entries (driver):
         print("calling click_canvas_at...")
         click_canvas_at(driver, flutter_view_element, 492, 36 )
 
-        print("sleeping for 3 ...")
-        time.sleep(3)   # Give time for the view to update
-                         # if it ever expires again set it to 15
+        print("waiting up to 3s for the list view to settle ...")
+        wait_for_canvas_stable(driver, flutter_view_element, timeout=3)   # Give time for the view to update
+                         # if it ever expires again set the timeout to 15
 
         # 4. Re-locate the canvas element after navigation
         flutter_view_element = WebDriverWait(driver, 600).until(
@@ -375,65 +430,155 @@ def snapshot_schedule_entries (driver):
 
             print("Advancing wheel by {delta} px to next tile...")
             #print(f"Scrolling down for next day tile (scroll {i+2})...\n") # Original commented line, keeping it as is
-            scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=delta, steps=1, delay=1, x=1200, y=yabs)
+            scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=delta, steps=1, delay=0, x=1200, y=yabs)
 
             # If the next tile is Monday, skip the extra text tile # Original commented line, keeping it as is
             #if next_day_of_week == 0: # Original commented line, keeping it as is
             #   print("Advancing wheel by extra 160 px to skip over text before Monday...") # Original commented line, keeping it as is
             #   scroll_canvas_with_wheel(driver, flutter_view_element, delta_y=130, steps=1, delay=1, x=1200, y=350) # Original commented line, keeping it as is
-            time.sleep(1)
+            wait_for_canvas_stable(driver, flutter_view_element, timeout=2)
 
-    # OCR all snapshots and write results to file
 
-    output_path = OCR_RESULTS_FILEPATH
+def snapshot_schedule_entries (driver, context, ocr_executor=None):
+    """
+    Capture, OCR and parse the schedule. The result files are written to the run's
+    workspace and then published to its output directory; the workspace paths are returned.
+    ocr_executor may be a process pool shared with other sessions; one is created
+    (and shut down again) when it is None.
+    """
+
+    # scroll through the schedule canvas and snapshot them
+    flutter_view_element = open_schedule_list(driver, output_dir=context.workspace)
+
+    # Start the background OCR stage; frames are OCR'd and parsed while the browser keeps navigating
+    ocr_cache = OcrCache(cache_dir=OCR_CACHE_DIR if ENABLE_OCR_DISK_CACHE else None)
+    owns_executor = ocr_executor is None
+    if owns_executor:
+        ocr_executor = make_ocr_executor()
+    ocr_pipeline = OcrPipeline(executor=ocr_executor, cache=ocr_cache, parser=parse_shift_record,
+                               skipped=context.skipped_frames)
+
+    # Repeated frames (a scroll or click that didn't register) are dropped before OCR
+    frames = capture_detail_views(driver, flutter_view_element, output_dir=context.workspace)
+    for index, png_filename, png_bytes in dedup_frames(frames, skipped=context.skipped_frames):
+        ocr_pipeline.submit(index, png_filename, png_bytes)
+
+    # Wait for the OCR stage to catch up with the last captured frame
+    ocr_results = ocr_pipeline.close()
+    # The dates of all cards, days without a shift included, bound the stale-shift deletes of the calendar sync
+    context.scanned_days = [parse_card_date(text.strip().replace('\n', ' ')) for _, text, _ in ocr_results.values()]
+    if owns_executor and ocr_executor is not None:
+        ocr_executor.shutdown()
+    print(ocr_cache.stats())
+
+    # Write all OCR results to a text file
+    output_path = context.path(OCR_RESULTS_FILENAME)
     with open(output_path, "w", encoding="utf-8") as f:
-        for i in range(1, num_scrolls + 1):
-            img_path = os.path.join(SCREENSHOT_OUTPUT_DIR, f"detail_view_{i}_canvas.png")
-            if not os.path.exists(img_path):
-                print(f"File not found: {img_path}")
-                continue
-            img = Image.open(img_path)
-            text = pytesseract.image_to_string(img)
+        for i, (png_filename, text, entry) in ocr_results.items():
             print(f"--- OCR Result {i} ---\n{text}\n{'-'*40}")
             f.write(f"--- OCR Result {i} ---\n{text}\n{'-'*40}\n")
 
     #print(f"OCR results saved to {output_path}") # Original commented line, keeping it as is
 
     # Save OCR results to CSV
-    output_csv_path = OCR_CSV_FILEPATH
-    output_csv_path = os.path.join(SCREENSHOT_OUTPUT_DIR, "ocr_results.csv")
+    output_csv_path = context.path(OCR_CSV_FILENAME)
     with open(output_csv_path, "w", encoding="utf-8", newline='') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["filename", "ocr_text"])   # Header row
 
-        for i in range(1, num_scrolls + 1):
-            img_path = os.path.join(SCREENSHOT_OUTPUT_DIR, f"detail_view_{i}_canvas.png")
-            if not os.path.exists(img_path):
-                print(f"File not found: {img_path}")
-                continue
-            img = Image.open(img_path)
-            text = pytesseract.image_to_string(img)
+        for i, (png_filename, text, entry) in ocr_results.items():
             if "Not Scheduled" in text:
-                print(f"Skipping {img_path} (Not Scheduled)")
+                print(f"Skipping {png_filename} (Not Scheduled)")
                 continue
             # Write filename and OCR text as a row
-            writer.writerow([os.path.basename(img_path), text.strip().replace('\n', ' ')])
+            writer.writerow([png_filename, text.strip().replace('\n', ' ')])
 
     #print(f"OCR CSV results saved to {output_csv_path}") # Original commented line, keeping it as is
 
     # After writing ocr_results.csv
     # structured_csv_path = os.path.join(SCREENSHOT_OUTPUT_DIR, "ocr_results_structured.csv")
-    structured_csv_path = OCR_FILEPATH
+    structured_csv_path = context.path(OCR_OUTPUT_FILENAME)
 
-    entries = parse_ocr_csv(output_csv_path)
+    records = [record for _, _, record in ocr_results.values() if record is not None]
     with open(structured_csv_path, "w", encoding="utf-8", newline='') as f:
         writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES)
         writer.writeheader()
-        for entry in entries:
-            writer.writerow(entry)
+        for record in records:
+            writer.writerow(record.as_row())
     #print(f"Structured CSV written to {structured_csv_path}") # Original commented line, keeping it as is
+    context.publish(OCR_RESULTS_FILENAME, OCR_CSV_FILENAME, OCR_OUTPUT_FILENAME)
     return output_path, output_csv_path, structured_csv_path   # Return all paths
 
+def tap_ocr_results(ocr_results, context):
+    """
+    Pass (index, png_filename, text) OCR results through unchanged while appending
+    each one to the run's all-results text file and ocr_results.csv (debug sinks).
+    """
+    with open(context.path(OCR_RESULTS_FILENAME), "w", encoding="utf-8") as text_file, \
+            open(context.path(OCR_CSV_FILENAME), "w", encoding="utf-8", newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["filename", "ocr_text"])   # Header row
+        for i, png_filename, text in ocr_results:
+            text_file.write(f"--- OCR Result {i} ---\n{text}\n{'-'*40}\n")
+            if "Not Scheduled" not in text:
+                writer.writerow([png_filename, text.strip().replace('\n', ' ')])
+            text_file.flush()
+            csvfile.flush()
+            yield i, png_filename, text
+
+
+def tap_structured_csv(records, context):
+    """Pass ShiftRecords through unchanged while writing each one to the run's structured CSV (debug sink)."""
+    with open(context.path(OCR_OUTPUT_FILENAME), "w", encoding="utf-8", newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record.as_row())
+            f.flush()
+            yield record
+
+
+def stream_schedule_to_calendar(driver, context, write_csv_taps=STREAM_WRITE_CSV_TAPS):
+    """
+    Streaming alternative to snapshot_schedule_entries + calendar_builder.main.
+    Every stage is a generator pulling from the previous one:
+      capture -> dedup -> OCR -> parse -> validate -> event body -> calendar sync
+    and only the frames inside the OCR lookahead window are held in memory. With
+    STREAM_CONFIRM_WRITES the changes are reviewed once the scan ends; without it a shift
+    is written to the calendar while later days are still being captured.
+    """
+    creds = get_credentials(context.token_file)
+    service = build('calendar', 'v3', credentials=creds)
+    calendar_id = get_or_create_calendar(service)
+
+    flutter_view_element = open_schedule_list(driver, output_dir=context.workspace)
+
+    ocr_cache = OcrCache(cache_dir=OCR_CACHE_DIR if ENABLE_OCR_DISK_CACHE else None)
+    ocr_executor = make_ocr_executor()
+    try:
+        frames = capture_detail_views(driver, flutter_view_element, output_dir=context.workspace)
+        ocr_results = ocr_stage(dedup_frames(frames, skipped=context.skipped_frames),
+                                executor=ocr_executor, cache=ocr_cache, skipped=context.skipped_frames)
+        if write_csv_taps:
+            ocr_results = tap_ocr_results(ocr_results, context)
+        records = scan_years(parse_stage(ocr_results, scanned_days=context.scanned_days))
+        if write_csv_taps:
+            records = tap_structured_csv(records, context)
+        event_bodies = shift_event_bodies(valid_shifts(records), CALENDAR_TIMEZONE)
+
+        results = stream_sync_events(service, calendar_id, event_bodies, CALENDAR_TIMEZONE,
+                                     state_cache=CalendarStateCache(context.state_file or CALENDAR_STATE_FILE),
+                                     scanned_days=context.scanned_days, skipped_frames=context.skipped_frames,
+                                     confirm=STREAM_CONFIRM_WRITES,
+                                     writer=CalendarWriter(http_factory=make_http_factory(creds)))
+        if write_csv_taps:
+            context.publish(OCR_RESULTS_FILENAME, OCR_CSV_FILENAME, OCR_OUTPUT_FILENAME)
+        return results
+    finally:
+        if ocr_executor is not None:
+            ocr_executor.shutdown()
+        print(ocr_cache.stats())
+
 def get_calendar_id_gui():
     #Prompts the user for the Google Calendar ID using a simple GUI dialog.
     print("DEBUG: Entering get_calendar_id_gui()")
@@ -457,17 +602,17 @@ def get_calendar_id_gui():
 # Updated to accept calendar_id and structured_csv_path
 print("calling create_Calendar_events!")
 #def create_calendar_events_from_results(calendar_id, structured_csv_path):
-def create_calendar_events_from_results(calendar_id):
+def create_calendar_events_from_results(calendar_id, context):
 #def create_calendar_events_from_results():
-    """Optional final step to create Google Calendar events"""
+    """Optional final step to create Google Calendar events from this run's structured CSV"""
     try:
         # Import and use build_calendar functionality
         print(f"\n=== STEP 3: CREATING CALENDAR EVENTS ===")
         #print(f"Using calendar: {calendar_id}")
-        print(f"Using CSV: {structured_csv_path}")
+        print(f"Using CSV: {context.path(OCR_OUTPUT_FILENAME)}")
 
-        # Call the calendar creation logic, passing the obtained calendar_id and CSV path
-        create_calendar_events(calendar_id)
+        # Call the calendar creation logic, passing the obtained calendar_id and the run context
+        create_calendar_events(calendar_id, context=context)
 
         print("Calendar events created successfully!")
 
@@ -503,54 +648,60 @@ if __name__ == "__main__":
     print(f"DEBUG: Finished calendar ID input handling in __main__. Final calendar_id: '{calendar_id}'")
     # --- End Calendar ID Input Handling ---
 
-    output_path         = OCR_RESULTS_FILEPATH
-    structured_csv_path = OCR_FILEPATH 
+    # Every run works in its own workspace and publishes its results to SCREENSHOT_OUTPUT_DIR at the end
+    context = RunContext()
+    output_path         = context.output_path(OCR_RESULTS_FILENAME)
+    structured_csv_path = context.output_path(OCR_OUTPUT_FILENAME)
 
     # turn off scraping here for debugging
 
     # Prepare the environment for the script run
-    # --- Ensure no other Chrome instances are running ---
-    # First, check if Chrome is running and kill it if necessary
-    if is_chrome_running():
-        print("Chrome is currently running. Attempting to terminate existing instances...")
+    # --- Optionally stop every other Chrome instance (only our own browser is stopped at the end) ---
+    if KILL_EXISTING_CHROME:
         kill_chrome_processes()
-    else:
-        print("Chrome is not currently running.")
     # --- End of Chrome process management ---
 
-    # cleanup from prevous run, start browser and login to website
-    cleanup_environment()
-    driver = launch_browser(headless=False)
-    driver.get(WEB_APP_URL)
-    # structured_csv_path = os.path.join(SCREENSHOT_OUTPUT_DIR, "ocr_results_structured.csv") # Original line
-    structured_csv_path = OCR_FILEPATH # Using OCR_FILEPATH from config for consistency
-
-    # handle login and hop to home depot dashboard
-    print("calling handle_thd_login()")
-    handle_thd_login (driver)
-
-    # traverse the schedule and take snapshots of schedule entires
-    print("calling snapshot_schedule_entries()")
-    output_path, output_csv_path, structured_csv_path = snapshot_schedule_entries(driver)
-
-    # turn off scraping end of block
-
-
-    # here is the call to create calendar entires
-    print(f"DEBUG: About to call create_calendar_events_from_results in calendar_builder.pywith arguments {calendar_id}")
-    #create_calendar_events_from_results(calendar_id, structured_csv_path)
-    create_calendar_events_from_results(calendar_id)
-    print("DEBUG: create_calendar_events_from_results call completed.")
-
-    # script Wrap-up
-    print("\n--- SCRIPT COMPLETED ---")
-    print(f"OCR results saved to: {output_path}")
-    #print(f"OCR CSV results saved to: {output_csv_path}") # Original commented line, keeping it as is
-    print(f"Structured CSV written to: {structured_csv_path}")
-
+    driver = None
+    try:
+        # cleanup from prevous run, start browser and login to website
+        cleanup_environment(context)
+        driver = launch_browser(headless=False, user_data_dir=context.profile_dir)
+        driver.get(WEB_APP_URL)
+
+        # handle login and hop to home depot dashboard, unless the reused profile is still logged in
+        if REUSE_BROWSER_PROFILE and has_valid_session(driver):
+            print("Skipping login.")
+        else:
+            print("calling handle_thd_login()")
+            handle_thd_login (driver)
 
-    # Always ensure the browser is closed properly at the end of the script
-    # This also ensures the undetected_chromedriver process is terminated.
-    if 'driver' in locals() and driver:
-        print("Closing Chrome browser.")
-        driver.quit()
+        if ENABLE_STREAMING_PIPELINE:
+            # capture, OCR, parse and calendar sync run as one stream; CSVs are optional taps
+            print("calling stream_schedule_to_calendar()")
+            stream_schedule_to_calendar(driver, context)
+        else:
+            # traverse the schedule and take snapshots of schedule entires
+            print("calling snapshot_schedule_entries()")
+            snapshot_schedule_entries(driver, context)
+
+            # turn off scraping end of block
+
+
+            # here is the call to create calendar entires
+            print(f"DEBUG: About to call create_calendar_events_from_results in calendar_builder.pywith arguments {calendar_id}")
+            #create_calendar_events_from_results(calendar_id, structured_csv_path)
+            create_calendar_events_from_results(calendar_id, context)
+            print("DEBUG: create_calendar_events_from_results call completed.")
+
+        # script Wrap-up
+        print("\n--- SCRIPT COMPLETED ---")
+        print(f"OCR results saved to: {output_path}")
+        #print(f"OCR CSV results saved to: {output_csv_path}") # Original commented line, keeping it as is
+        print(f"Structured CSV written to: {structured_csv_path}")
+    finally:
+        # Always close the browser and remove the run's workspace, also when the run failed.
+        # This also ensures the undetected_chromedriver process and its Chrome processes are terminated.
+        if driver is not None:
+            print("Closing Chrome browser.")
+            quit_browser(driver)
+        context.close()
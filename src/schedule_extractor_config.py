@@ -41,6 +41,12 @@ TESSERACT_PATH = r'C:\\Program Files\\TESSERACT-OCR\\tesseract.exe' # Corrected
 WEB_APP_URL = 'https://wft.homedepot.com/'
 WEB_APP_LOGIN_URL = 'https://identity.homedepot.com/as/LsQp3/resume/as/authorization.ping'
 
+# --- LOGIN HANDOFF ---
+# Maximum time for the user to complete login and CAPTCHA before the script gives up.
+LOGIN_TIMEOUT_SECONDS = 600
+# How often the browser URL/dashboard is checked while waiting on the user.
+LOGIN_POLL_INTERVAL = 0.25
+
 # --- ABSOLUTE PATH FOR SCREENSHOT, CSV and OCR OUTPUT ---
 SCREENSHOT_OUTPUT_DIR   = r'C:\\temp\\ScheduleScreenshots'
 OCR_OUTPUT_FILENAME     = f'ocr_results_structured.csv'
@@ -52,10 +58,89 @@ OCR_CSV_FILEPATH        = f'{SCREENSHOT_OUTPUT_DIR}/{OCR_CSV_FILENAME}'
 
 SCREENSHOT_BASE_NAME = 'flutter_view_screenshot' # Base name, will add _0, _1, etc.
 
+# Every run works in its own folder SCREENSHOT_OUTPUT_DIR/runs/<run id> and publishes the
+# finished CSV/text files above to SCREENSHOT_OUTPUT_DIR when done (see run_context.py).
+# Run folders of crashed runs are removed once they are this old.
+RUN_WORKSPACE_MAX_AGE_HOURS = 24
+
+# Snapshots are OCR'd straight from memory. Set to True to also write every
+# snapshot PNG to the run's folder under SCREENSHOT_OUTPUT_DIR/runs for debugging (e.g., finding
+# click coordinates); the run folder is then kept instead of being removed at the end of the run.
+SAVE_SNAPSHOTS_TO_DISK = False
+
+# --- OCR ENGINE ---
+# 'tesserocr' keeps one Tesseract engine loaded per OCR worker (pip install tesserocr),
+# 'pytesseract' starts tesseract.exe for every image, 'auto' prefers tesserocr when installed.
+OCR_BACKEND = 'auto'
+OCR_LANGUAGE = 'eng'
+# Page segmentation mode: 6 = a single uniform block of text, which suits a cropped
+# schedule tile. Use 3 (fully automatic) when OCR'ing uncropped full-window frames.
+OCR_PAGE_SEG_MODE = 6
+# Characters that can appear on a schedule tile (names, dates, times, store and department).
+OCR_CHAR_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789:#-&/.,'
+# Folder containing eng.traineddata for tesserocr. None uses the TESSDATA_PREFIX environment variable.
+OCR_TESSDATA_PATH = None
+
+# --- OCR RESULT CACHE ---
+# Extra command-line config passed to Tesseract. Part of the OCR cache key, so
+# changing it invalidates previously cached results.
+TESSERACT_CONFIG = ''
+# Set to True to persist OCR results across runs. The cache directory is shared by
+# all runs on the host; entries are written atomically.
+ENABLE_OCR_DISK_CACHE = True
+OCR_CACHE_DIR       = r'C:\\temp\\ScheduleOcrCache'
+OCR_CACHE_MAX_BYTES = 16 * 1024 * 1024 # Least recently used entries are evicted beyond this size
+
+# --- PARALLEL OCR ---
+# Number of OCR worker processes. None uses one per CPU core; 1 runs OCR in the main process.
+OCR_MAX_WORKERS = None
+# Threads each tesseract process may use (OMP_THREAD_LIMIT). Keep at 1 when running several workers.
+OCR_TESSERACT_THREADS = 1
+# Captured frames waiting for OCR before the capture loop is made to wait.
+OCR_PIPELINE_QUEUE_SIZE = 8
+
 # User data directory for Chrome. This stores your browser profile (cookies, login sessions).
 # undetected_chromedriver can use this for persistence.
 CHROME_USER_DATA_DIR = "C:\\SeleniumChromeProfile"
 
+# Keep CHROME_USER_DATA_DIR between runs so the WFT session, cookies and HTTP cache survive.
+# When the saved session is still valid the login/CAPTCHA step is skipped entirely.
+# Set to False to start every run with a fresh, cold profile in its run folder.
+# A reused profile can only be open in one browser at a time: runs started at the same time
+# need separate CHROME_USER_DATA_DIR values (and separate token/calendar_state files, see
+# run_context.py), or REUSE_BROWSER_PROFILE = False. extraction_scheduler.py does this per account.
+REUSE_BROWSER_PROFILE = True
+# How long to wait for flutter-view before deciding the saved session has expired.
+SESSION_PROBE_TIMEOUT = 10
+
+# Window size for headless Chrome, which has no screen to maximize to. The canvas click and
+# scroll coordinates were calibrated on a maximized 1920x1080 window.
+HEADLESS_WINDOW_SIZE = (1920, 1080)
+
+# --- BROWSER PROCESSES ---
+# The script records the chromedriver and Chrome processes it starts and, when done,
+# stops only those. Seconds to wait for them to exit before they are killed:
+BROWSER_TERMINATE_TIMEOUT = 5
+# Set to True to terminate EVERY Chrome/chromedriver process on the host before starting
+# (the old behavior). This also closes your own Chrome windows and other runs' browsers.
+KILL_EXISTING_CHROME = False
+
+# --- MULTI-ACCOUNT SCHEDULER ---
+# extraction_scheduler.py extracts the schedules of every account in ACCOUNTS_FILE (a CSV
+# with an 'account' column), each in its own headless browser. Every account gets its own
+# Chrome profile under ACCOUNT_PROFILES_DIR and its own output folder under ACCOUNT_OUTPUT_DIR.
+# Headless sessions cannot do the login/CAPTCHA, so each profile must first be logged in once:
+#   python extraction_scheduler.py --login <account>
+ACCOUNTS_FILE        = 'accounts.csv'
+ACCOUNT_PROFILES_DIR = r'C:\\SeleniumChromeProfiles'
+ACCOUNT_OUTPUT_DIR   = r'C:\\temp\\ScheduleAccounts'
+# What one headless session (Chrome browser, renderer and GPU processes) needs.
+# The number of concurrent sessions is the smallest of the CPU limit, the free-memory
+# limit, SCHEDULER_MAX_SESSIONS and the number of accounts.
+SCHEDULER_CPUS_PER_SESSION      = 1
+SCHEDULER_MEMORY_PER_SESSION_MB = 700
+SCHEDULER_MAX_SESSIONS          = None  # None = no fixed cap
+
 # --- Chrome Browser Version for undetected_chromedriver ---
 # IMPORTANT: Replace 0 with YOUR Chrome browser's major version number (e.g., 125, 126).
 # You can find this by typing chrome://version into your Chrome browser's address bar.
@@ -98,7 +183,67 @@ ENABLE_SCREENSHOT_CROPPING = True
 CROP_COORDINATES = (540, 88, 1045, 584)
 
 # Set to True if you want to apply image pre-processing for better OCR results.
+# Converts the (cropped) snapshot to grayscale, rescales it from OCR_SOURCE_DPI to
+# OCR_TARGET_DPI and binarizes it before it is handed to Tesseract.
 ENABLE_IMAGE_PREPROCESSING = False
+# Screen captures are ~96 DPI. Lower OCR_TARGET_DPI to shrink frames (faster OCR),
+# raise it if small text is being misread.
+OCR_SOURCE_DPI = 96
+OCR_TARGET_DPI = 96
+
+# --- SCREENSHOT CAPTURE ---
+# 'cdp' captures frames with Chrome DevTools Page.captureScreenshot: with
+# ENABLE_SCREENSHOT_CROPPING the browser only renders and encodes the CROP_COORDINATES
+# box (the crop is then not repeated before OCR). 'webdriver' uses WebDriver element
+# screenshots of the whole canvas, as PNG. 'cdp' falls back to 'webdriver' on failure.
+CAPTURE_BACKEND = 'cdp'
+# 'png' or 'webp' (smaller to transfer). WebP keeps quality at 100 so OCR doesn't
+# read compression artifacts. Only used by the 'cdp' backend.
+CAPTURE_FORMAT = 'png'
+CAPTURE_WEBP_QUALITY = 100
+# Frame size relative to the canvas. Below 1.0 fewer pixels are sent and OCR'd;
+# OCR_SOURCE_DPI is scaled along with it for the DPI rescale step.
+CAPTURE_SCALE = 1.0
+# Ask Chrome for its faster, less compressed encoder (larger frames, less encode time).
+CAPTURE_OPTIMIZE_FOR_SPEED = True
+
+# --- CANVAS INPUT ---
+# 'cdp' sends clicks and wheel scrolls as Chrome DevTools Input.dispatchMouseEvent
+# commands, with the canvas position cached; 'script' builds pointer/wheel events in
+# page JavaScript with one execute_script per event.
+INPUT_BACKEND = 'cdp'
+# Keep one DevTools websocket open for input (needs: pip install websocket-client);
+# otherwise, or if it can't connect, each event goes through driver.execute_cdp_cmd.
+INPUT_PERSISTENT_CONNECTION = True
+INPUT_TIMEOUT = 10  # Seconds to wait for DevTools to acknowledge an input event
+
+# --- REGION-OF-INTEREST OCR ---
+# Instead of one Tesseract pass over the whole tile, OCR only the boxes that hold the
+# parsed fields, each with its own page-segmentation mode and character whitelist, and
+# join the results in this order for the parser. Boxes are (left, top, right, bottom)
+# in canvas pixels, like CROP_COORDINATES; calibrate them on detail views saved with
+# SAVE_SNAPSHOTS_TO_DISK before enabling.
+ENABLE_ROI_OCR = False
+TILE_FIELD_BOXES = {
+    'name_store': {'box': (540, 88, 1045, 150),  'psm': 7, 'whitelist': 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789#'},
+    'date':       {'box': (540, 150, 1045, 200), 'psm': 7, 'whitelist': 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789,'},
+    # Times also allow the letters of "Not Scheduled"/"Not Assigned" so days off are still recognized
+    'times':      {'box': (540, 200, 1045, 420), 'psm': 6, 'whitelist': '0123456789:APM-NotScheduledAssigned'},
+    'department': {'box': (540, 420, 1045, 584), 'psm': 7, 'whitelist': 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-&'},
+}
+
+# --- DUPLICATE FRAME DETECTION ---
+# A wheel scroll that doesn't move the list, or a missed click, captures the same
+# detail view twice. Every frame gets a difference hash (dHash) of its date strip only:
+# the rest of the card looks alike for the same shift on different days. A frame within
+# FRAME_DEDUP_MAX_DISTANCE bits of the previous one is a duplicate.
+# 'skip' needs a calibrated date box (see TILE_FIELD_BOXES); when a frame is skipped its
+# day counts as not scanned, so stale shifts are not removed from the calendar that run.
+ENABLE_FRAME_DEDUP = True
+FRAME_DEDUP_BOX = TILE_FIELD_BOXES['date']['box']  # Canvas pixels, like CROP_COORDINATES
+FRAME_DEDUP_HASH_SIZE = 16       # 16x16 = 256-bit hash
+FRAME_DEDUP_MAX_DISTANCE = 0     # Hamming distance (bits) still counted as the same frame
+FRAME_DEDUP_ACTION = 'flag'      # 'flag' only reports duplicates, 'skip' drops them before OCR
 
 # --- LOCATOR FOR WAITING FOR INITIAL DASHBOARD CONTENT LOAD ---
 # This is CRUCIAL for robust initial dashboard loading.
@@ -136,4 +281,24 @@ DRAG_START_Y_OFFSET_RELATIVE_TO_ELEMENT_HEIGHT = 0.1
 
 MAX_DRAG_ATTEMPTS = 10
 
+# --- CANVAS STABILITY WAITS ---
+# After a click or scroll the script waits until consecutive low-resolution canvas
+# thumbnails are identical instead of sleeping for a fixed time.
+CANVAS_STABLE_TIMEOUT   = 3     # Upper bound in seconds (per-call timeouts override this)
+CANVAS_STABLE_INTERVAL  = 0.1   # Seconds between thumbnails
+CANVAS_STABLE_SAMPLES   = 3     # Consecutive identical thumbnails that count as "stable"
+CANVAS_STABLE_MIN_WAIT  = 0.15  # Always wait at least this long so the input is picked up first
+CANVAS_THUMBNAIL_SCALE  = 0.1   # Thumbnail size relative to the canvas
+
+# --- STREAMING PIPELINE ---
+# Stream every captured frame through OCR -> parse -> validate -> event body -> calendar
+# sync as it arrives, instead of writing CSVs and re-reading them afterwards.
+ENABLE_STREAMING_PIPELINE = False
+# Still write the OCR text/CSV and structured CSV as the data streams past (debug sinks)
+STREAM_WRITE_CSV_TAPS = True
+# Show every insert, update and removal once the stream ends and write only after confirmation.
+# False writes each shift as soon as it is parsed (unattended runs): an OCR misparse is
+# written immediately, and stale shifts are removed without asking.
+STREAM_CONFIRM_WRITES = True
+
 # EOF
@@ -15,17 +15,21 @@
 #   - Update or extend functions as needed for your workflow.
 # =============================================================================
 
-import csv
 import os
-import re
 import subprocess
 import time
-from datetime import datetime, timedelta
 from selenium.webdriver.common.by import By
 
 # Import psutil for robust process management
 import psutil
 
+# OCR text parsing lives in ocr_text_parser; re-exported for existing callers
+from ocr_text_parser import extract_username, parse_ocr_text, parse_ocr_csv  # noqa: F401
+from schedule_extractor_config import (
+    CANVAS_STABLE_TIMEOUT, CANVAS_STABLE_INTERVAL, CANVAS_STABLE_SAMPLES, CANVAS_STABLE_MIN_WAIT,
+    CANVAS_THUMBNAIL_SCALE, BROWSER_TERMINATE_TIMEOUT
+)
+
 def is_chrome_running():
     """
     Checks if any Google Chrome or ChromeDriver process is currently running using psutil.
@@ -43,13 +47,15 @@ def is_chrome_running():
             continue
     return False
 
-def kill_chrome_processes():
+def kill_chrome_processes(timeout=BROWSER_TERMINATE_TIMEOUT):
     """
-    Terminates all Google Chrome and ChromeDriver processes found using psutil.
-    Provides feedback on termination status.
+    Terminates ALL Google Chrome and ChromeDriver processes on the host found using psutil,
+    including ones this script didn't start. Only used when KILL_EXISTING_CHROME is set;
+    normally browser_process.quit_browser stops just the script's own browser.
+    Waits up to timeout seconds for them to exit, then kills the survivors.
     """
     print("Checking for and terminating existing Chrome/ChromeDriver processes...")
-    killed_any = False
+    terminated = []
     for proc in psutil.process_iter(['name', 'pid']):
         try:
             process_name = proc.info['name'].lower()
@@ -58,20 +64,20 @@ def kill_chrome_processes():
                'google chrome' in process_name:
                 print(f"Terminating process: {proc.info['name']} (PID: {proc.info['pid']})")
                 proc.terminate() # Request graceful termination
-                killed_any = True
+                terminated.append(proc)
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             continue
 
-    if killed_any:
+    if terminated:
         print("Waiting for processes to terminate...")
-        time.sleep(2) # Give some time for processes to actually terminate
-
-        # Verify if any Chrome processes are still running after termination attempt
-        if is_chrome_running():
-            print("Warning: Some Chrome processes might still be running after termination attempt.")
-            print("Consider using 'proc.kill()' for a more forceful termination if issues persist.")
-        else:
-            print("All detected Chrome/ChromeDriver processes have been terminated.")
+        _, alive = psutil.wait_procs(terminated, timeout=timeout)
+        for proc in alive:
+            try:
+                print(f"Killing process that did not exit: PID {proc.pid}")
+                proc.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        print(f"Terminated {len(terminated)} Chrome/ChromeDriver process(es).")
     else:
         print("No Chrome/ChromeDriver processes were found running.")
 
@@ -97,13 +103,14 @@ def kill_chrome_processes():
 #             pass
 #     return False
 
-def initialize_undetected_chrome_driver(options=None):
+def initialize_undetected_chrome_driver(options=None, user_data_dir=None):
     import undetected_chromedriver as uc
     from schedule_extractor_config import CHROMEDRIVER_PATH # Ensure this is correctly imported or passed
     if options is None:
         options = uc.ChromeOptions()
         options.add_argument("--start-maximized")
-    driver = uc.Chrome(driver_executable_path=CHROMEDRIVER_PATH, options=options)
+    # With an explicit user_data_dir the profile (cookies, cache) survives driver.quit()
+    driver = uc.Chrome(driver_executable_path=CHROMEDRIVER_PATH, options=options, user_data_dir=user_data_dir)
     return driver
 
 def perform_login(driver, username, password):
@@ -130,26 +137,93 @@ def drag_element_to_scroll(driver, element, amount_y):
     """Deprecated: Use mouse click to advance instead of drag/swipe."""
     pass
 
-def capture_and_ocr_segment(driver, element, attempt_num):
-    """Capture a screenshot of the element and perform OCR."""
-    import pytesseract
+def capture_and_ocr_segment(driver, element, attempt_num, save_to_disk=False):
+    """Capture a screenshot of the element in memory and perform OCR."""
     from PIL import Image
+    from ocr_backends import get_ocr_backend
     import io
 
-    screenshot_path = f"screenshots/schedule_segment_{attempt_num}.png"
-    element.screenshot(screenshot_path)
-    print(f"Captured screenshot: {screenshot_path}")
+    png_bytes = element.screenshot_as_png
+    if save_to_disk:
+        screenshot_path = f"screenshots/schedule_segment_{attempt_num}.png"
+        with open(screenshot_path, "wb") as f:
+            f.write(png_bytes)
+        print(f"Captured screenshot: {screenshot_path}")
 
     # OCR processing
     try:
-        img = Image.open(screenshot_path)
-        text = pytesseract.image_to_string(img)
+        img = Image.open(io.BytesIO(png_bytes))
+        text = get_ocr_backend().image_to_string(img)
         lines = [line.strip() for line in text.splitlines() if line.strip()]
         return lines
     except Exception as e:
         print(f"OCR failed: {e}")
         return []
 
+def get_element_rect(driver, element):
+    """
+    Return the element's viewport rectangle in CSS pixels and the page's devicePixelRatio
+    as [left, top, width, height, ratio]. Shared by the capture and input code.
+    """
+    return driver.execute_script(
+        "const r = arguments[0].getBoundingClientRect();"
+        "return [r.left, r.top, r.width, r.height, window.devicePixelRatio || 1];",
+        element
+    )
+
+def capture_canvas_thumbnail(driver, element, rect=None, scale=CANVAS_THUMBNAIL_SCALE):
+    """
+    Capture a small, cheap thumbnail of the element for change detection.
+    Uses Chrome DevTools to render a downscaled clip of the element; falls back to a
+    full element screenshot on drivers without CDP support. Returns an opaque string.
+    """
+    try:
+        if rect is None:
+            rect = get_element_rect(driver, element)
+        left, top, width, height, _ = rect
+        result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png",
+            "clip": {"x": left, "y": top, "width": width, "height": height, "scale": scale},
+        })
+        return result["data"]
+    except Exception:
+        return element.screenshot_as_base64
+
+def wait_for_canvas_stable(driver, element, timeout=CANVAS_STABLE_TIMEOUT, interval=CANVAS_STABLE_INTERVAL,
+                           stable_samples=CANVAS_STABLE_SAMPLES, min_wait=CANVAS_STABLE_MIN_WAIT):
+    """
+    Wait until the canvas stops changing, i.e. stable_samples consecutive thumbnails match.
+    Replaces fixed sleeps after clicks/scrolls: returns as soon as Flutter has finished
+    rendering, and never waits longer than timeout (the old worst-case sleep).
+    Returns True if the canvas settled, False if timeout was reached first.
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    time.sleep(min_wait)  # Give Flutter a moment to start reacting to the input
+
+    try:
+        rect = get_element_rect(driver, element)
+    except Exception:
+        rect = None
+
+    previous = None
+    matches = 1
+    while True:
+        frame = capture_canvas_thumbnail(driver, element, rect)
+        if frame == previous:
+            matches += 1
+            if matches >= stable_samples:
+                print(f"Canvas stable after {time.perf_counter() - started:.2f}s")
+                return True
+        else:
+            matches = 1
+        previous = frame
+
+        if time.perf_counter() + interval > deadline:
+            print(f"Canvas still changing after {timeout}s; continuing anyway")
+            return False
+        time.sleep(interval)
+
 def perform_mouse_click_on_element(driver, element, x_offset, y_offset):
     """Clicks at a specific offset within a given element."""
     from selenium.webdriver.common.action_chains import ActionChains
@@ -162,76 +236,6 @@ COLUMN_NAMES = [
     'shift_start', 'meal_start', 'meal_end', 'shift_end', 'department'
 ]
 
-def extract_username(text):
-    # Find first occurrence of a name followed by a single uppercase letter
-    match = re.search(r'\b([A-Z][a-zA-Z]*) ([A-Z])\b', text)
-    if match:
-        return f"{match.group(1)} {match.group(2)}"
-    return ''
-
-def parse_ocr_csv(csv_path):
-    time_pattern = re.compile(r'\d{1,2}:\d{2}\s*[AP]M', re.IGNORECASE)
-    results = []
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            text = row['ocr_text']
-            if "not assigned" in text.lower() or "not scheduled" in text.lower():
-                continue
-
-            png_filename = row['filename']
-            username = extract_username(text)
-            store_number = re.search(r'#\d{4}', text)
-            store_number = store_number.group(0) if store_number else ''
-            weekday = re.search(r'\b(Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b', text)
-            weekday = weekday.group(0) if weekday else ''
-            month = re.search(r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b', text)
-            month = month.group(0) if month else ''
-            date = re.search(r'\b([12][0-9]|3[01]|[1-9])\b', text)
-            date = date.group(0) if date else ''
-
-            # Extract all time values
-            times = time_pattern.findall(text)
-            shift_start = times[0] if len(times) > 0 else ''
-            meal_start = times[1] if len(times) > 1 else ''
-            meal_end = ''
-            shift_end = times[-1] if times else ''
-
-            # Find meal_end as the next time 30 or 60 mins after meal_start
-            def parse_time(t):
-                return datetime.strptime(t.strip().upper(), "%I:%M %p")
-            if meal_start:
-                try:
-                    meal_start_dt = parse_time(meal_start)
-                    for t in times[2:]:
-                        t_dt = parse_time(t)
-                        diff = (t_dt - meal_start_dt).total_seconds() / 60
-                        if diff in (30, 60):
-                            meal_end = t
-                            break
-                except Exception:
-                    meal_end = times[2] if len(times) > 2 else ''
-
-            # Department: match "0xx - " followed by department name, stopping before any trailing number
-            dept_match = re.search(r'0\d{2}\s*-\s*[A-Za-z &]+', text)
-            department = dept_match.group(0).strip() if dept_match else ''
-
-            entry = {
-                'png_filename': png_filename,
-                'username': username,
-                'store_number': store_number,
-                'weekday': weekday,
-                'month': month,
-                'date': date,
-                'shift_start': shift_start,
-                'meal_start': meal_start,
-                'meal_end': meal_end,
-                'shift_end': shift_end,
-                'department': department
-            }
-            results.append(entry)
-    return results
-
 # The `driver.quit()` calls at the end of the original utils file
 # are typically handled in the main script's `finally` block or at the end of `if __name__ == "__main__":`.
 # Keeping them here can lead to issues if the driver object isn't available or if the utils file is
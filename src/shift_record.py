@@ -0,0 +1,256 @@
+# =============================================================================
+# shift_record.py
+# -----------------------------------------------------------------------------
+# Compact, typed representation of one scheduled shift.
+# A ShiftRecord uses __slots__ and stores times as minute-of-day integers,
+# the date as a proleptic Gregorian ordinal and weekday/month as small
+# integers. It is built once by the parser and passed unchanged to the
+# calendar code, which no longer re-parses strings with strptime.
+#
+# Author: Martin Baer
+# Version: 0.0.80
+# Created: 2026-10-16
+# License: MIT
+# -----------------------------------------------------------------------------
+# Notes:
+#   - as_row()/from_row() convert to and from the structured CSV columns
+#     (COLUMN_NAMES), so the CSV files keep their format.
+#   - Missing or unreadable fields are None.
+#   - Cards only show month and day. ScanYears gives the dates of one scan
+#     their years in capture order, so a scan from December into January
+#     puts January in the next year; scan_window() is the date range a scan
+#     covered, which bounds the stale-shift deletes of the calendar sync.
+# =============================================================================
+
+import datetime
+import re
+import sys
+from functools import lru_cache
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Abbreviated and full month names (any case) -> month number
+MONTH_NUMBERS = {}
+for _number, _name in enumerate(MONTHS, 1):
+    _full_name = datetime.date(2000, _number, 1).strftime("%B")
+    for _key in (_name, _full_name):
+        MONTH_NUMBERS[_key.lower()] = _number
+
+# Every spelling of the 1,440 minutes of the day that the tokenizer normally sees
+TIME_TABLE = {
+    f"{hour_str}:{minute:02d} {meridiem}": (hour % 12 + (12 if meridiem == 'PM' else 0)) * 60 + minute
+    for hour in range(1, 13)
+    for hour_str in {str(hour), f"{hour:02d}"}
+    for minute in range(60)
+    for meridiem in ('AM', 'PM')
+}
+
+# OCR drops or doubles the space before AM/PM ("11:00AM", "7:00  pm")
+MERIDIEM_SPACING = re.compile(r'\s*([AP]M)$')
+
+
+@lru_cache(maxsize=1024)
+def _parse_unusual_time(key):
+    """Minute of day for spellings missing from TIME_TABLE (other spacing etc.), None if invalid."""
+    try:
+        parsed = datetime.datetime.strptime(MERIDIEM_SPACING.sub(r' \1', key), "%I:%M %p")
+    except ValueError:
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+
+def time_to_minutes(time_str):
+    """
+    Minute of day (0-1439) of an 'H:MM AM' string in any case and with or without the
+    space before AM/PM, or None if it isn't a valid 12-hour time.
+    """
+    key = time_str.strip().upper()
+    minutes = TIME_TABLE.get(key)
+    if minutes is None:
+        minutes = _parse_unusual_time(key)
+    return minutes
+
+
+def format_minutes(minutes):
+    """'H:MM AM' for a minute of day, '' for None."""
+    if minutes is None:
+        return ''
+    hour, minute = divmod(minutes, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def _date_or_none(year, month, day):
+    try:
+        return datetime.date(year, month, day)
+    except (TypeError, ValueError):
+        return None
+
+
+def nearest_year(month, day, today=None):
+    """The year that puts month/day closest to today (a scan may start last December or run into next January)."""
+    today = today or datetime.date.today()
+    candidates = [
+        date for date in (_date_or_none(year, month, day) for year in (today.year - 1, today.year, today.year + 1))
+        if date is not None
+    ]
+    return min(candidates, key=lambda date: abs(date - today)).year if candidates else today.year
+
+
+class ScanYears:
+    """
+    Assigns years to the month/day dates of one scan, in capture order. The first date
+    gets year (default: the year closest to today) and the year rolls forward whenever
+    the month decreases.
+    """
+
+    def __init__(self, year=None, today=None):
+        self.year = year
+        self.today = today
+        self._month = None
+
+    def date(self, month, day):
+        """datetime.date for the next month/day of the scan, or None if it isn't a valid date."""
+        if not month or not day:
+            return None
+        if self.year is None:
+            self.year = nearest_year(month, day, self.today)
+        elif self._month is not None and month < self._month:
+            self.year += 1
+        self._month = month
+        return _date_or_none(self.year, month, day)
+
+    def assign(self, record):
+        """Set record.ordinal from its month/day in scan order; returns the record."""
+        date = self.date(record.month, record.day)
+        record.ordinal = date.toordinal() if date else None
+        return record
+
+
+def scan_years(records, year=None, today=None):
+    """Yields the ShiftRecords of one scan (in capture order) with their years assigned by ScanYears."""
+    years = ScanYears(year, today)
+    for record in records:
+        yield years.assign(record)
+
+
+def scan_window(scanned_days, skipped_frames=(), today=None):
+    """
+    (first_date, last_date) as YYYY-MM-DD: the days one scan covered, read from every
+    captured card in capture order (scanned_days holds (month, day) or None per card,
+    days without a shift included). Returns None, so no shift is deleted as stale, when
+    frames were skipped, no date was readable, or the dates span more days than were
+    scanned (a misread month or year).
+    """
+    if skipped_frames:
+        print(f"{len(skipped_frames)} frame(s) were not scanned; shifts missing from this scan are kept in the calendar.")
+        return None
+    years = ScanYears(today=today)
+    dates = [date for date in (years.date(*day) for day in scanned_days if day) if date is not None]
+    if not dates:
+        print("No scanned dates were readable; shifts missing from this scan are kept in the calendar.")
+        return None
+    first_date, last_date = min(dates), max(dates)
+    if (last_date - first_date).days + 1 > len(scanned_days):
+        print(f"Scanned dates {first_date} to {last_date} span more than the {len(scanned_days)} scanned day(s); "
+              f"shifts missing from this scan are kept in the calendar.")
+        return None
+    return first_date.isoformat(), last_date.isoformat()
+
+
+def _minutes_or_none(time_str):
+    return time_to_minutes(time_str) if time_str and time_str.strip() else None
+
+
+def _index_or_none(names, name):
+    try:
+        return names.index(name.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+class ShiftRecord:
+    """One shift: day ordinal, minute-of-day times and the card's text fields."""
+
+    __slots__ = (
+        'png_filename', 'username', 'store_number', 'department',
+        'weekday', 'month', 'day', 'ordinal',
+        'shift_start', 'meal_start', 'meal_end', 'shift_end',
+    )
+
+    def __init__(self, png_filename='', username='', store_number='', department='',
+                 weekday=None, month=None, day=None, ordinal=None,
+                 shift_start=None, meal_start=None, meal_end=None, shift_end=None):
+        self.png_filename = png_filename
+        self.username = username
+        self.store_number = store_number
+        self.department = department
+        self.weekday = weekday          # 0 = Monday
+        self.month = month              # 1-12
+        self.day = day                  # Day of month as printed on the card
+        self.ordinal = ordinal          # date.toordinal() once the year is known
+        self.shift_start = shift_start  # Minutes after midnight
+        self.meal_start = meal_start
+        self.meal_end = meal_end
+        self.shift_end = shift_end
+
+    @classmethod
+    def from_row(cls, row, year=None):
+        """
+        Build a record from a dict with the structured CSV columns (strings).
+        year defaults to the current year (see scan_years for a whole scan); the date
+        ordinal is None if month/day are unusable.
+        """
+        month = MONTH_NUMBERS.get((row.get('month') or '').strip().lower())
+        try:
+            day = int(row.get('date') or '')
+        except ValueError:
+            day = None
+        date = _date_or_none(year or datetime.date.today().year, month, day) if month and day else None
+        ordinal = date.toordinal() if date else None
+        return cls(
+            png_filename=row.get('png_filename') or '',
+            # The same few names, stores and departments repeat across records; share one copy
+            username=sys.intern(row.get('username') or ''),
+            store_number=sys.intern(row.get('store_number') or ''),
+            department=sys.intern(row.get('department') or ''),
+            weekday=_index_or_none(WEEKDAYS, row.get('weekday')),
+            month=month,
+            day=day,
+            ordinal=ordinal,
+            shift_start=_minutes_or_none(row.get('shift_start')),
+            meal_start=_minutes_or_none(row.get('meal_start')),
+            meal_end=_minutes_or_none(row.get('meal_end')),
+            shift_end=_minutes_or_none(row.get('shift_end')),
+        )
+
+    def as_row(self):
+        """The record as a dict of strings with the structured CSV columns."""
+        return {
+            'png_filename': self.png_filename,
+            'username': self.username,
+            'store_number': self.store_number,
+            'weekday': WEEKDAYS[self.weekday] if self.weekday is not None else '',
+            'month': MONTHS[self.month - 1] if self.month else '',
+            'date': str(self.day) if self.day else '',
+            'shift_start': format_minutes(self.shift_start),
+            'meal_start': format_minutes(self.meal_start),
+            'meal_end': format_minutes(self.meal_end),
+            'shift_end': format_minutes(self.shift_end),
+            'department': self.department,
+        }
+
+    def is_complete(self):
+        """True when the record has a date and both shift times, i.e. can become a calendar event."""
+        return self.ordinal is not None and self.shift_start is not None and self.shift_end is not None
+
+    def start_datetime(self):
+        return datetime.datetime.fromordinal(self.ordinal) + datetime.timedelta(minutes=self.shift_start)
+
+    def end_datetime(self):
+        """Shift end; a shift ending before its start time (overnight) ends on the next day."""
+        days = 1 if self.shift_end < self.shift_start else 0
+        return datetime.datetime.fromordinal(self.ordinal + days) + datetime.timedelta(minutes=self.shift_end)
+
+    def __repr__(self):
+        return f"ShiftRecord({self.as_row()!r})"
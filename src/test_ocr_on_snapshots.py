@@ -1,22 +1,35 @@
 import os
-from PIL import Image
-import pytesseract
+
+from ocr_cache import OcrCache
+from ocr_engine import make_ocr_executor, ocr_images
 
 SCREENSHOT_OUTPUT_DIR = r"C:\temp\ScheduleScreenshots"
 num_snapshots = 10  # Adjust if you have more/less
 
 output_path = os.path.join(SCREENSHOT_OUTPUT_DIR, "all_ocr_results.txt")
 
-with open(output_path, "w", encoding="utf-8") as f:
-    for i in range(1, num_snapshots + 1):
-        img_path = os.path.join(SCREENSHOT_OUTPUT_DIR, f"dom_scroll_{i}_canvas.png")
-        if not os.path.exists(img_path):
-            print(f"File not found: {img_path}")
-            continue
 
-        img = Image.open(img_path)
-        text = pytesseract.image_to_string(img)
-        print(f"--- OCR Result {i} ---\n{text}\n{'-'*40}")
-        f.write(f"--- OCR Result {i} ---\n{text}\n{'-'*40}\n")
+def main():
+    image_paths = [
+        (i, os.path.join(SCREENSHOT_OUTPUT_DIR, f"dom_scroll_{i}_canvas.png"))
+        for i in range(1, num_snapshots + 1)
+    ]
+
+    # OCR runs in worker processes, so this must stay behind the __main__ guard
+    executor = make_ocr_executor()
+    try:
+        results = ocr_images(image_paths, executor=executor, cache=OcrCache())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        for i, (img_path, text) in results.items():
+            print(f"--- OCR Result {i} ---\n{text}\n{'-'*40}")
+            f.write(f"--- OCR Result {i} ---\n{text}\n{'-'*40}\n")
+
+    print(f"OCR results saved to {output_path}")
+
 
-print(f"OCR results saved to {output_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
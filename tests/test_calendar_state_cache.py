@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+calendar_state_cache = pytest.importorskip('calendar_state_cache')
+calendar_builder = pytest.importorskip('calendar_builder')
+from calendar_state_cache import CalendarStateCache, events_between
+
+TAG = {'private': dict(calendar_builder.EVENT_SOURCE_TAG)}
+
+
+def shift(event_id, ical_uid, date, status='confirmed'):
+    return {'id': event_id, 'iCalUID': ical_uid, 'status': status, 'summary': 'THD', 'description': '',
+            'extendedProperties': TAG, 'start': {'dateTime': f'{date}T07:00:00-07:00'},
+            'end': {'dateTime': f'{date}T15:00:00-07:00'}}
+
+
+class FakeEvents:
+    """events().list() answering every sync with the next page of changes; get() from a server-side copy."""
+
+    def __init__(self, pages, server=()):
+        self.pages = list(pages)
+        self.server = {event['id']: event for event in server}
+        self.request = None
+
+    def list(self, **params):
+        self.request = lambda: {'items': self.pages.pop(0), 'nextSyncToken': 'token'}
+        return self
+
+    def get(self, calendarId, eventId):
+        self.request = lambda: self.server[eventId]
+        return self
+
+    def execute(self):
+        return self.request()
+
+
+class FakeService:
+    def __init__(self, events):
+        self._events = events
+
+    def events(self):
+        return self._events
+
+
+def restore_plan(events):
+    """plan_calendar_sync for the shift 'uid-1' on 2026-10-20 coming back, against the cached events."""
+    existing = calendar_builder.index_events_by_ical_uid(
+        events_between(events, '2026-10-19', '2026-10-21', include_cancelled=True))
+    return calendar_builder.plan_calendar_sync(existing, {'uid-1': shift(None, 'uid-1', '2026-10-20')})
+
+
+def test_bare_deletion_keeps_known_fields_across_a_full_resync(tmp_path):
+    path = tmp_path / 'state.json'
+    # The token expired (no sync_token): the full resync reports the deletion as a bare entry
+    path.write_text(json.dumps({'cal': {'sync_token': None, 'events': {'e1': shift('e1', 'uid-1', '2026-10-20')}}}))
+    events = CalendarStateCache(str(path)).sync(FakeService(FakeEvents([[{'id': 'e1', 'status': 'cancelled'}]])), 'cal')
+
+    assert events[0]['iCalUID'] == 'uid-1' and events[0]['status'] == 'cancelled'
+    plan = restore_plan(events)
+    assert plan['insert'] == []
+    assert [(event['id'], patch['status']) for event, patch in plan['patch']] == [('e1', 'confirmed')]
+
+
+def test_unknown_bare_deletion_is_looked_up_and_restored(tmp_path):
+    deleted = shift('e2', 'uid-1', '2026-10-20', status='cancelled')
+    service = FakeService(FakeEvents([[], [{'id': 'e2', 'status': 'cancelled'}]], server=[deleted]))
+    cache = CalendarStateCache(str(tmp_path / 'state.json'))
+    cache.sync(service, 'cal')
+    events = cache.sync(service, 'cal')
+
+    assert events[0]['iCalUID'] == 'uid-1'
+    assert [event['id'] for event, _ in restore_plan(events)['patch']] == ['e2']
+
+
+def test_undated_deletion_is_kept_only_with_include_cancelled():
+    events = [{'id': 'e3', 'iCalUID': 'uid-1', 'status': 'cancelled'}, shift('e4', 'uid-4', '2026-10-20'),
+              {'id': 'e5', 'status': 'cancelled'}]
+    assert [event['id'] for event in events_between(events, '2026-10-19', '2026-10-21', include_cancelled=True)] \
+        == ['e3', 'e4']
+    assert [event['id'] for event in events_between(events, '2026-10-19', '2026-10-21')] == ['e4']
+    assert [event['id'] for event, _ in restore_plan(events)['patch']] == ['e3']
@@ -0,0 +1,70 @@
+import pytest
+
+delete_calendar_events = pytest.importorskip('delete_calendar_events')
+from calendar_builder import EVENT_SOURCE_TAG
+from calendar_state_cache import CalendarStateCache
+
+TAG = {'private': dict(EVENT_SOURCE_TAG)}
+
+
+def event(event_id, summary, date, tagged=True, status='confirmed', description=''):
+    body = {'id': event_id, 'iCalUID': event_id, 'status': status, 'summary': summary, 'description': description,
+            'start': {'dateTime': f'{date}T07:00:00Z'}, 'end': {'dateTime': f'{date}T15:00:00Z'}}
+    if tagged:
+        body['extendedProperties'] = TAG
+    return body
+
+
+class FakeEvents:
+    """events().list() with the server-side filters the Calendar API applies."""
+
+    def __init__(self, events):
+        self.events = events
+        self.params = None
+
+    def list(self, **params):
+        self.params = params
+        return self
+
+    def execute(self):
+        params = self.params
+        if 'syncToken' in params or params.get('showDeleted'):
+            return {'items': list(self.events), 'nextSyncToken': 'token'}
+        items = [e for e in self.events if e['status'] != 'cancelled'
+                 and params['timeMin'] <= e['end']['dateTime'] and e['start']['dateTime'] < params['timeMax']]
+        if 'q' in params:
+            q = params['q'].lower()
+            items = [e for e in items if q in e['summary'].lower() or q in e['description'].lower()]
+        for prop in params.get('privateExtendedProperty', []):
+            key, value = prop.split('=', 1)
+            items = [e for e in items if e.get('extendedProperties', {}).get('private', {}).get(key) == value]
+        return {'items': items}
+
+
+class FakeService:
+    def __init__(self, events):
+        self._events = FakeEvents(events)
+
+    def events(self):
+        return self._events
+
+
+CALENDAR = [
+    event('thd', 'THD', '2026-10-20'),
+    event('thd-untagged', 'THD', '2026-10-21', tagged=False),
+    event('thd-training', 'THD training', '2026-10-22'),
+    event('mentions-thd', 'Dentist', '2026-10-23', description='before THD shift'),
+    event('thd-cancelled', 'THD', '2026-10-24', status='cancelled'),
+    event('thd-outside', 'THD', '2026-12-01'),
+]
+
+
+@pytest.mark.parametrize('summary, tagged_only', [(None, False), ('THD', False), (None, True), ('THD', True)])
+def test_cached_and_listed_paths_select_the_same_events(tmp_path, summary, tagged_only):
+    service = FakeService(CALENDAR)
+    listed = delete_calendar_events.list_events_in_window(
+        service, 'cal', '2026-10-01T00:00:00Z', '2026-11-01T00:00:00Z', summary, tagged_only)
+    cached = delete_calendar_events.cached_events_in_window(
+        CalendarStateCache(str(tmp_path / 'state.json')), service, 'cal', '2026-10-01', '2026-10-31', summary, tagged_only)
+    assert [e['id'] for e in cached] == [e['id'] for e in listed]
+    assert 'thd-outside' not in [e['id'] for e in cached]
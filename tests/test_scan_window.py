@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+from ocr_text_parser import parse_card_date
+from shift_record import ShiftRecord, nearest_year, scan_window, scan_years
+
+
+def scan_days(first, count):
+    """(month, day) of count consecutive captured cards starting at first."""
+    return [((first + datetime.timedelta(days=n)).month, (first + datetime.timedelta(days=n)).day)
+            for n in range(count)]
+
+
+def test_december_to_january_scan_rolls_the_year():
+    today = datetime.date(2026, 12, 18)
+    days = scan_days(datetime.date(2026, 12, 20), 21)  # Dec 20 .. Jan 9
+
+    assert scan_window(days, today=today) == ('2026-12-20', '2027-01-09')
+
+    records = [ShiftRecord.from_row({'month': 'Dec', 'date': '20'}),
+               ShiftRecord.from_row({'month': 'Dec', 'date': '31'}),
+               ShiftRecord.from_row({'month': 'Jan', 'date': '9'})]
+    dates = [datetime.date.fromordinal(record.ordinal) for record in scan_years(records, today=today)]
+    assert dates == [datetime.date(2026, 12, 20), datetime.date(2026, 12, 31), datetime.date(2027, 1, 9)]
+
+
+def test_scan_started_last_december():
+    today = datetime.date(2027, 1, 3)
+    assert nearest_year(12, 28, today) == 2026
+    assert scan_window(scan_days(datetime.date(2026, 12, 28), 21), today=today) == ('2026-12-28', '2027-01-17')
+
+
+def test_window_includes_scanned_days_without_a_shift():
+    # Only the middle card has a shift; the window still spans every scanned card
+    texts = ["Mon Oct 12 Not Scheduled", "Tue, Oct 13 Shift 7:00 AM - 3:30 PM", "Wed Oct 14 Not Scheduled"]
+    days = [parse_card_date(text) for text in texts]
+    assert days == [(10, 12), (10, 13), (10, 14)]
+    assert scan_window(days, today=datetime.date(2026, 10, 10)) == ('2026-10-12', '2026-10-14')
+
+
+def test_no_window_when_dates_span_more_than_the_scan():
+    days = scan_days(datetime.date(2026, 10, 12), 7)
+    days[3] = (1, 15)  # Misread month
+    assert scan_window(days, today=datetime.date(2026, 10, 10)) is None
+
+
+def test_no_window_when_frames_were_skipped_or_unreadable():
+    days = scan_days(datetime.date(2026, 10, 12), 7)
+    assert scan_window(days, skipped_frames=['detail_view_3_canvas.png']) is None
+    assert scan_window([None, None]) is None
+
+
+def test_stale_deletes_stay_inside_the_scan():
+    calendar_builder = pytest.importorskip('calendar_builder')
+    tag = {'private': dict(calendar_builder.EVENT_SOURCE_TAG)}
+
+    def event(uid, date):
+        return {'id': uid, 'iCalUID': uid, 'status': 'confirmed', 'extendedProperties': tag,
+                'start': {'dateTime': f'{date}T07:00:00-08:00'}, 'end': {'dateTime': f'{date}T15:00:00-08:00'}}
+
+    existing = {uid: event(uid, date) for uid, date in
+                (('dec20', '2026-12-20'), ('jan09', '2027-01-09'), ('feb10', '2027-02-10'), ('nov10', '2026-11-10'))}
+    window = scan_window(scan_days(datetime.date(2026, 12, 20), 21), today=datetime.date(2026, 12, 18))
+    plan = calendar_builder.plan_calendar_sync(existing, {}, window)
+    assert sorted(event['id'] for event in plan['delete']) == ['dec20', 'jan09']
+    assert calendar_builder.plan_calendar_sync(existing, {}, None)['delete'] == []